@@ -0,0 +1,358 @@
+import io
+import zipfile
+import zlib
+from itertools import chain
+from typing import IO, Any, Iterable, Iterator, Sequence, cast
+from xml.sax.saxutils import escape
+
+from api.fonts import FIRST_CHAR, LAST_CHAR, StandardFont, TrueTypeFont
+
+CHUNK_SIZE = 64 * 1024
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'content-types">'
+        '<Default Extension="rels" ContentType="application/'
+        'vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/'
+        'spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.'
+        'org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Список покупок" sheetId="1" r:id="rId1"/>'
+        '</sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+XLSX_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main"><sheetData>'
+)
+XLSX_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+class ChunkedOutput(io.RawIOBase):
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def xlsx_cell(value: Any) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def stream_xlsx(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> Iterator[bytes]:
+    output = ChunkedOutput()
+    archive_file = cast(IO[bytes], output)
+    with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            buffer = [XLSX_SHEET_HEADER]
+            for row in chain((headers,), rows):
+                buffer.append(
+                    f'<row>{"".join(xlsx_cell(cell) for cell in row)}</row>'
+                )
+                if len(buffer) >= 512:
+                    sheet.write(''.join(buffer).encode())
+                    buffer = []
+                    if output.size >= CHUNK_SIZE:
+                        yield output.pop()
+            buffer.append(XLSX_SHEET_FOOTER)
+            sheet.write(''.join(buffer).encode())
+    yield output.pop()
+
+
+def pdf_string(text: bytes) -> bytes:
+    return b'(%s)' % (
+        text.replace(b'\\', b'\\\\')
+        .replace(b'(', b'\\(')
+        .replace(b')', b'\\)')
+    )
+
+
+class PDFWriter:
+    (
+        catalog_ref,
+        pages_ref,
+        font_ref,
+        font_descriptor_ref,
+        font_file_ref,
+        to_unicode_ref,
+    ) = range(1, 7)
+
+    def __init__(
+        self,
+        font: StandardFont,
+        column_offsets: Sequence[float],
+        page_size: tuple[float, float] = (595, 842),
+        margin: float = 50,
+        font_size: float = 10,
+        leading: float = 14,
+    ) -> None:
+        self.font = font
+        self.column_offsets = column_offsets
+        self.width, self.height = page_size
+        self.margin = margin
+        self.font_size = font_size
+        self.leading = leading
+        self.lines_per_page = int((self.height - 2 * margin) // leading) - 1
+        self.offsets: dict[int, int] = {}
+        self.position = 0
+        self.next_number = self.to_unicode_ref + 1
+        self.kids: list[int] = []
+
+    def stream(
+        self,
+        headers: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+    ) -> Iterator[bytes]:
+        yield self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        yield self._object(
+            self.catalog_ref,
+            b'<< /Type /Catalog /Pages %d 0 R >>' % self.pages_ref,
+        )
+        yield from self._font_objects()
+        header_line = self._encode_row(headers)
+        page_lines = []
+        for row in rows:
+            page_lines.append(self._encode_row(row))
+            if len(page_lines) == self.lines_per_page:
+                yield self._page(header_line, page_lines)
+                page_lines = []
+        if page_lines or not self.kids:
+            yield self._page(header_line, page_lines)
+        yield self._object(
+            self.pages_ref,
+            b'<< /Type /Pages /Kids [%s] /Count %d >>'
+            % (
+                b' '.join(b'%d 0 R' % kid for kid in self.kids),
+                len(self.kids),
+            ),
+        )
+        yield self._trailer()
+
+    def _write(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        self.offsets[number] = self.position
+        return self._write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+
+    def _stream_object(
+        self,
+        number: int,
+        data: bytes,
+        extra: bytes = b'',
+    ) -> bytes:
+        compressed = zlib.compress(data)
+        return self._object(
+            number,
+            b'<< /Length %d /Filter /FlateDecode%s >>\nstream\n%s\nendstream'
+            % (len(compressed), extra, compressed),
+        )
+
+    def _font_objects(self) -> Iterator[bytes]:
+        font = self.font
+        if not isinstance(font, TrueTypeFont):
+            yield self._object(
+                self.font_ref,
+                b'<< /Type /Font /Subtype /Type1 /BaseFont /%s '
+                b'/Encoding /WinAnsiEncoding >>' % font.name.encode(),
+            )
+            return
+        widths = b' '.join(b'%d' % width for width in font.widths[FIRST_CHAR:])
+        differences = b' '.join(
+            b'%d /uni%04X' % (code, char)
+            for code, char in font.unicode.items()
+            if code > 127
+        )
+        yield self._object(
+            self.font_ref,
+            b'<< /Type /Font /Subtype /TrueType /BaseFont /%s '
+            b'/FirstChar %d /LastChar %d /Widths [%s] '
+            b'/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+            b'/Differences [%s] >> /FontDescriptor %d 0 R '
+            b'/ToUnicode %d 0 R >>'
+            % (
+                font.name.encode(),
+                FIRST_CHAR,
+                LAST_CHAR,
+                widths,
+                differences,
+                self.font_descriptor_ref,
+                self.to_unicode_ref,
+            ),
+        )
+        yield self._object(
+            self.font_descriptor_ref,
+            b'<< /Type /FontDescriptor /FontName /%s /Flags 32 '
+            b'/FontBBox [%s] /ItalicAngle 0 /Ascent %d '
+            b'/Descent %d /CapHeight %d /StemV 80 /FontFile2 %d 0 R >>'
+            % (
+                font.name.encode(),
+                b' '.join(b'%d' % value for value in font.bbox),
+                font.ascent,
+                font.descent,
+                font.ascent,
+                self.font_file_ref,
+            ),
+        )
+        yield self._stream_object(
+            self.font_file_ref,
+            font.data,
+            b' /Length1 %d' % len(font.data),
+        )
+        yield self._stream_object(self.to_unicode_ref, self._to_unicode())
+
+    def _to_unicode(self) -> bytes:
+        mappings = [
+            b'<%02X> <%04X>' % (code, char)
+            for code, char in self.font.unicode.items()
+        ]
+        blocks = []
+        for start in range(0, len(mappings), 100):
+            block = mappings[start:][:100]
+            blocks.extend(
+                (b'%d beginbfchar' % len(block), *block, b'endbfchar')
+            )
+        return b'\n'.join(
+            (
+                b'/CIDInit /ProcSet findresource begin',
+                b'12 dict begin',
+                b'begincmap',
+                b'/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) '
+                b'/Supplement 0 >> def',
+                b'/CMapName /Adobe-Identity-UCS def',
+                b'/CMapType 2 def',
+                b'1 begincodespacerange',
+                b'<00> <FF>',
+                b'endcodespacerange',
+                *blocks,
+                b'endcmap',
+                b'CMapName currentdict /CMap defineresource pop',
+                b'end',
+                b'end',
+            )
+        )
+
+    def _encode_row(self, row: Sequence[Any]) -> list[bytes]:
+        cells = []
+        for index, value in enumerate(row):
+            text = self.font.encode(str(value))
+            if index + 1 < len(self.column_offsets):
+                text = self._truncate(
+                    text,
+                    self.column_offsets[index + 1]
+                    - self.column_offsets[index]
+                    - self.font_size,
+                )
+            cells.append(text)
+        return cells
+
+    def _truncate(self, text: bytes, width: float) -> bytes:
+        limit = width * 1000 / self.font_size
+        if len(text) * self.font.max_width <= limit:
+            return text
+        widths = self.font.widths
+        for index, code in enumerate(text):
+            limit -= widths[code]
+            if limit < 0:
+                return text[:index]
+        return text
+
+    def _page(
+        self,
+        header_line: list[bytes],
+        page_lines: list[list[bytes]],
+    ) -> bytes:
+        content = [b'BT /F1 %g Tf' % self.font_size]
+        top = self.height - self.margin - self.font_size
+        for number, line in enumerate((header_line, *page_lines)):
+            baseline = top - number * self.leading
+            for offset, text in zip(self.column_offsets, line):
+                content.append(
+                    b'1 0 0 1 %g %g Tm %s Tj'
+                    % (self.margin + offset, baseline, pdf_string(text))
+                )
+        content.append(b'ET')
+        content_number, page_number = self.next_number, self.next_number + 1
+        self.next_number += 2
+        self.kids.append(page_number)
+        return self._stream_object(
+            content_number,
+            b'\n'.join(content),
+        ) + self._object(
+            page_number,
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (
+                self.pages_ref,
+                self.width,
+                self.height,
+                self.font_ref,
+                content_number,
+            ),
+        )
+
+    def _trailer(self) -> bytes:
+        size = self.next_number
+        xref = [b'xref\n0 %d\n0000000000 65535 f \n' % size]
+        xref.extend(
+            b'%010d 00000 n \n' % self.offsets[number]
+            if number in self.offsets
+            else b'0000000000 65535 f \n'
+            for number in range(1, size)
+        )
+        return self._write(
+            b''.join(xref)
+            + b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (size, self.catalog_ref, self.position)
+        )
@@ -1,13 +1,96 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
+from typing import IO
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.base import File
+from PIL import Image
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+BASE64_MARKER = ';base64,'
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+def decode_base64(data: str, start: int, output: IO[bytes]) -> int:
+    size, remainder = 0, ''
+    for offset in range(start, len(data), DECODE_CHUNK_SIZE):
+        end = offset + DECODE_CHUNK_SIZE
+        chunk = remainder + ''.join(data[offset:end].split())
+        end = len(chunk) - len(chunk) % 4
+        remainder = chunk[end:]
+        size += output.write(base64.b64decode(chunk[:end], validate=True))
+    if remainder:
+        raise binascii.Error('Incorrect padding')
+    output.seek(0)
+    return size
 
 
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            img_format, img_str = data.split(';base64,')
-            _, ext = img_format.split('/')
-            data = ContentFile(base64.b64decode(img_str), name='temp.' + ext)
-        return super().to_internal_value(data)
+            marker = data.find(BASE64_MARKER, 0, 64)
+            if marker == -1:
+                self.fail('invalid_image')
+            ext = data[:marker].rpartition('/')[2]
+            output = SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            )
+            try:
+                size = decode_base64(data, marker + len(BASE64_MARKER), output)
+            except binascii.Error:
+                output.close()
+                self.fail('invalid_image')
+            data = File(output, name=f'temp.{ext}')
+            data.size = size
+        file_object = serializers.FileField.to_internal_value(self, data)
+        try:
+            image = Image.open(file_object)
+        except (OSError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        file_object.content_type = Image.MIME.get(image.format)
+        file_object.seek(0)
+        return file_object
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    default_error_messages = {
+        **ManyRelatedField.default_error_messages,
+        'does_not_exist': 'Objects with ids {pk_values} do not exist.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        pk_values = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pk_values.append(int(item))
+            except (TypeError, ValueError):
+                self.child_relation.fail(
+                    'incorrect_type',
+                    data_type=type(item).__name__,
+                )
+        objects = self.child_relation.get_queryset().in_bulk(set(pk_values))
+        missing = sorted(set(pk_values) - objects.keys())
+        if missing:
+            self.fail(
+                'does_not_exist',
+                pk_values=', '.join(str(pk) for pk in missing),
+            )
+        return [objects[pk] for pk in pk_values]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
@@ -1,31 +1,150 @@
+from functools import lru_cache
+from typing import Optional
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import (
+    Case,
+    Exists,
+    Expression,
+    OuterRef,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Upper
+from django_filters import fields
 from django_filters import rest_framework as dj_filters
 from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from recipes.cache import get_version
+from recipes.models import Cart, Favorite, Recipe, Tag, User
+
+
+@lru_cache(maxsize=None)
+def has_trigram_extension(alias: str) -> bool:
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS(SELECT 1 FROM pg_extension "
+            "WHERE extname = 'pg_trgm')"
+        )
+        return cursor.fetchone()[0]
+
+
+def get_tag_ids() -> dict[str, int]:
+    key = f'tag_ids:{get_version(Tag)}'
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'pk'))
+        cache.set(key, tag_ids, timeout=None)
+    return tag_ids
+
+
+class TagSlugField(fields.MultipleChoiceField):
+    def valid_value(self, value: str) -> bool:
+        return value in get_tag_ids()
 
-from recipes.models import Tag, User
 
+class TagSlugFilter(dj_filters.MultipleChoiceFilter):
+    field_class = TagSlugField
 
-class IngredientSearchFilter(filters.SearchFilter):
+    def filter(self, qs: QuerySet, value: list[str]) -> QuerySet:
+        if not value:
+            return qs
+        tag_ids = get_tag_ids()
+        return qs.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag__in=[
+                        tag_ids[slug] for slug in value if slug in tag_ids
+                    ],
+                )
+            )
+        )
+
+
+class IngredientSearchFilter(filters.BaseFilterBackend):
     search_param = 'name'
+    max_results = 50
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,
+    ) -> QuerySet:
+        name = request.query_params.get(self.search_param, '').strip()
+        if not name:
+            return queryset
+        matches = Q(name__icontains=name)
+        similarity: Expression = Value(0.0)
+        if has_trigram_extension(queryset.db):
+            queryset = queryset.alias(upper_name=Upper('name'))
+            matches |= Q(upper_name__trigram_similar=name.upper())
+            similarity = TrigramSimilarity('upper_name', name.upper())
+        return (
+            queryset.filter(matches)
+            .annotate(
+                match_rank=Case(
+                    When(name__istartswith=name, then=Value(0)),
+                    When(name__icontains=name, then=Value(1)),
+                    default=Value(2),
+                ),
+                similarity=similarity,
+            )
+            .order_by('match_rank', '-similarity', 'name')[: self.max_results]
+        )
+
+
+class RecipeOrderingFilter(filters.OrderingFilter):
+    tie_breakers = ('-pub_date', '-id')
+
+    def get_ordering(
+        self,
+        request: Request,
+        queryset: QuerySet,
+        view: APIView,
+    ) -> Optional[list[str]]:
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        fields = {field.lstrip('-') for field in ordering}
+        return [
+            *ordering,
+            *(
+                field
+                for field in self.tie_breakers
+                if field.lstrip('-') not in fields
+            ),
+        ]
 
 
 class RecipeFilterSet(dj_filters.FilterSet):
     author = dj_filters.ModelChoiceFilter(queryset=User.objects.all())
-    tags = dj_filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        lookup_expr='icontains',
-        queryset=Tag.objects.all(),
-    )
+    tags = TagSlugFilter(field_name='tags__slug')
     is_favorited = dj_filters.BooleanFilter(method='filter')
     is_in_shopping_cart = dj_filters.BooleanFilter(method='filter')
 
     def filter(self, queryset, name, value):
-        query_lookup = {
-            'is_favorited': 'favorite__author',
-            'is_in_shopping_cart': 'cart__author',
+        models = {
+            'is_favorited': Favorite,
+            'is_in_shopping_cart': Cart,
         }
         if not value or not self.request.user.is_authenticated:
             return queryset
         return queryset.filter(
-            **{query_lookup.get(name, ''): self.request.user},
+            Exists(
+                models[name].objects.filter(
+                    author=self.request.user,
+                    recipe=OuterRef('pk'),
+                )
+            )
         )
@@ -0,0 +1,146 @@
+import logging
+import re
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FIRST_CHAR = 32
+LAST_CHAR = 255
+
+
+class StandardFont:
+    name = 'Helvetica'
+    encoding = 'cp1252'
+    default_width = 556
+
+    def __init__(self) -> None:
+        self.widths = [self.default_width] * (LAST_CHAR + 1)
+        self.max_width = self.default_width
+
+    def encode(self, text: str) -> bytes:
+        return text.encode(self.encoding, errors='replace')
+
+
+class TrueTypeFont(StandardFont):
+    encoding = 'cp1251'
+
+    def __init__(self, path: Path) -> None:
+        self.data = path.read_bytes()
+        self.name = re.sub(r'[^A-Za-z0-9-]', '', path.stem) or 'Font'
+        tables = self._read_tables()
+        head, hhea = tables['head'], tables['hhea']
+        self.units_per_em = struct.unpack_from('>H', head, 18)[0]
+        self.bbox = tuple(
+            self._scale(value) for value in struct.unpack_from('>4h', head, 36)
+        )
+        ascender, descender = struct.unpack_from('>2h', hhea, 4)
+        self.ascent = self._scale(ascender)
+        self.descent = self._scale(descender)
+        advances = self._read_advances(
+            tables['hmtx'],
+            struct.unpack_from('>H', hhea, 34)[0],
+        )
+        glyphs = self._read_cmap(tables['cmap'])
+        self.widths = [0] * (LAST_CHAR + 1)
+        self.unicode = {}
+        for code in range(FIRST_CHAR, LAST_CHAR + 1):
+            try:
+                char = bytes((code,)).decode(self.encoding)
+            except UnicodeDecodeError:
+                continue
+            glyph = glyphs.get(ord(char), 0)
+            self.widths[code] = self._scale(
+                advances[min(glyph, len(advances) - 1)]
+            )
+            self.unicode[code] = ord(char)
+        self.max_width = max(self.widths)
+
+    def _scale(self, value: int) -> int:
+        return round(value * 1000 / self.units_per_em)
+
+    def _read_tables(self) -> dict[str, bytes]:
+        num_tables = struct.unpack_from('>H', self.data, 4)[0]
+        tables = {}
+        for index in range(num_tables):
+            tag, _, offset, length = struct.unpack_from(
+                '>4sIII',
+                self.data,
+                12 + index * 16,
+            )
+            end = offset + length
+            tables[tag.decode('latin-1')] = self.data[offset:end]
+        return tables
+
+    @staticmethod
+    def _read_advances(hmtx: bytes, metrics_count: int) -> list[int]:
+        return [
+            struct.unpack_from('>H', hmtx, index * 4)[0]
+            for index in range(metrics_count)
+        ]
+
+    @staticmethod
+    def _read_cmap(cmap: bytes) -> dict[int, int]:
+        subtables = {}
+        for index in range(struct.unpack_from('>H', cmap, 2)[0]):
+            platform, encoding, offset = struct.unpack_from(
+                '>HHI',
+                cmap,
+                4 + index * 8,
+            )
+            subtables[(platform, encoding)] = offset
+        offset = subtables.get((3, 1), subtables.get((0, 3)))
+        if offset is None or struct.unpack_from('>H', cmap, offset)[0] != 4:
+            raise ValueError('Font has no Unicode BMP character map.')
+        seg_count = struct.unpack_from('>H', cmap, offset + 6)[0] // 2
+        ends_at = offset + 14
+        starts_at = ends_at + seg_count * 2 + 2
+        deltas_at = starts_at + seg_count * 2
+        range_offsets_at = deltas_at + seg_count * 2
+        glyphs = {}
+        for segment in range(seg_count):
+            end, start, delta, range_offset = (
+                struct.unpack_from('>H', cmap, position + segment * 2)[0]
+                for position in (
+                    ends_at,
+                    starts_at,
+                    deltas_at,
+                    range_offsets_at,
+                )
+            )
+            for char in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph = (char + delta) & 0xFFFF
+                else:
+                    glyph = struct.unpack_from(
+                        '>H',
+                        cmap,
+                        range_offsets_at
+                        + segment * 2
+                        + range_offset
+                        + (char - start) * 2,
+                    )[0]
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                glyphs[char] = glyph
+        return glyphs
+
+
+@lru_cache(maxsize=None)
+def load_font(path: Optional[str]) -> StandardFont:
+    if path and Path(path).is_file():
+        return TrueTypeFont(Path(path))
+    logger.warning(
+        'PDF font "%s" not found, falling back to %s without Cyrillic.',
+        path,
+        StandardFont.name,
+    )
+    return StandardFont()
+
+
+def get_pdf_font() -> StandardFont:
+    return load_font(getattr(settings, 'PDF_FONT_PATH', None))
@@ -0,0 +1,232 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.view_started: Optional[float] = None
+        self.view_sql_time = 0.0
+        self.render_started: Optional[float] = None
+        self.render_sql_time: Optional[float] = None
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    'current_metrics',
+    default=None,
+)
+
+
+def record_query(
+    execute: Callable,
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict,
+) -> Any:
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection: BaseDatabaseWrapper) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def on_connection_created(
+    sender: type,
+    connection: BaseDatabaseWrapper,
+    **kwargs: Any,
+) -> None:
+    install_query_recorder(connection)
+
+
+def mark_view_started() -> None:
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.view_started = time.perf_counter()
+        metrics.view_sql_time = metrics.sql_time
+
+
+def mark_render_started() -> None:
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.render_started = time.perf_counter()
+        metrics.render_sql_time = metrics.sql_time
+
+
+def measure_representation(
+    to_representation: Callable[[Any], Any],
+    instance: Any,
+) -> Any:
+    metrics = current_metrics.get()
+    if metrics is None or metrics.serializing:
+        return to_representation(instance)
+    metrics.serializing = True
+    started, sql_time = time.perf_counter(), metrics.sql_time
+    try:
+        return to_representation(instance)
+    finally:
+        metrics.serializing = False
+        metrics.serializer_time += (
+            time.perf_counter() - started - (metrics.sql_time - sql_time)
+        )
+
+
+def get_view_name(request: HttpRequest) -> str:
+    match = request.resolver_match
+    if match is None:
+        return request.path
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    action = getattr(match.func, 'actions', {}).get(
+        (request.method or '').lower()
+    )
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+    process_view: Callable[..., Any]
+    process_template_response: Callable[..., Any]
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        connection_created.connect(
+            on_connection_created,
+            dispatch_uid='request_metrics',
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+        else:
+            self.process_view = self.sync_process_view
+            self.process_template_response = (
+                self.sync_process_template_response
+            )
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install_query_recorder(connection)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finalize(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finalize(request, response, metrics)
+
+    def sync_process_view(self, request: HttpRequest, *args: Any) -> None:
+        mark_view_started()
+
+    def sync_process_template_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        mark_render_started()
+        return response
+
+    async def aprocess_view(self, request: HttpRequest, *args: Any) -> None:
+        mark_view_started()
+
+    async def aprocess_template_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        mark_render_started()
+        return response
+
+    def finalize(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        metrics: RequestMetrics,
+    ) -> HttpResponseBase:
+        finished = time.perf_counter()
+        view_started = metrics.view_started or metrics.started
+        render_started = metrics.render_started or finished
+        render_sql_time = metrics.render_sql_time
+        if render_sql_time is None:
+            render_sql_time = metrics.sql_time
+        view_sql_time = render_sql_time - metrics.view_sql_time
+        timings = {
+            'db': metrics.sql_time,
+            'view': (
+                render_started
+                - view_started
+                - view_sql_time
+                - metrics.serializer_time
+            ),
+            'serializer': metrics.serializer_time,
+            'render': finished - render_started,
+            'total': finished - metrics.started,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.1f}'
+            + (f';desc="{metrics.queries} queries"' if name == 'db' else '')
+            for name, duration in timings.items()
+        )
+        record = {
+            'view': get_view_name(request),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'queries': metrics.queries,
+            **{
+                f'{name}_ms': round(duration * 1000, 1)
+                for name, duration in timings.items()
+            },
+            'size': (None if response.streaming else len(response.content)),
+        }
+        level = logging.INFO
+        budget = settings.REQUEST_QUERY_BUDGET
+        if budget and metrics.queries > budget:
+            record['query_budget'] = budget
+            level = logging.WARNING
+        logger.log(
+            level,
+            json.dumps(record, ensure_ascii=False),
+            extra={'metrics': record},
+        )
+        return response
@@ -0,0 +1,405 @@
+import hashlib
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional, Union
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import Count, F, Func, Max, Model, QuerySet, Subquery
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    HttpResponseNotModified,
+)
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date
+from rest_framework import mixins, serializers, status
+from rest_framework.request import Request
+from rest_framework.viewsets import GenericViewSet, ViewSetMixin
+
+from api.middleware import measure_representation
+from recipes.cache import aget_version, get_modified, get_version
+from recipes.models import User
+
+
+def queryset_state(queryset: QuerySet, field: str = 'pk') -> tuple:
+    return tuple(
+        queryset.order_by()
+        .aggregate(count=Count('pk'), latest=Max(field))
+        .values()
+    )
+
+
+def user_state_query(
+    user: Union[AbstractBaseUser, AnonymousUser],
+    relations: Iterable[tuple[type[Model], str]],
+) -> Optional[QuerySet]:
+    if not user.is_authenticated:
+        return None
+    annotations = {}
+    for model, field in relations:
+        rows = model.objects.filter(**{field: user.pk}).order_by()
+        name = model._meta.model_name
+        for function in ('COUNT', 'MAX'):
+            annotations[f'{name}_{function.lower()}'] = Subquery(
+                rows.annotate(value=Func(F('pk'), function=function)).values(
+                    'value'
+                )
+            )
+    if not annotations:
+        return None
+    return (
+        User.objects.filter(pk=user.pk)
+        .annotate(**annotations)
+        .values_list(*annotations)
+    )
+
+
+def user_state(
+    user: Union[AbstractBaseUser, AnonymousUser],
+    relations: Iterable[tuple[type[Model], str]],
+) -> tuple:
+    query = user_state_query(user, relations)
+    if query is None:
+        return ()
+    return tuple(query.get())
+
+
+async def auser_state(
+    user: Union[AbstractBaseUser, AnonymousUser],
+    relations: Iterable[tuple[type[Model], str]],
+) -> tuple:
+    query = user_state_query(user, relations)
+    if query is None:
+        return ()
+    return tuple(await query.aget())
+
+
+class AsyncReadMixin(ViewSetMixin):
+    async_actions: tuple[str, ...] = ('list', 'retrieve')
+
+    @classonlymethod
+    def as_view(
+        cls,
+        actions: Optional[dict[str, str]] = None,
+        **initkwargs: Any,
+    ) -> Callable[..., Any]:
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASGI or not actions:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(
+            request: HttpRequest,
+            *args: Any,
+            **kwargs: Any,
+        ) -> HttpResponseBase:
+            response = await cls(**initkwargs).adispatch(
+                request,
+                dict(actions),
+                *args,
+                **kwargs,
+            )
+            if response is None:
+                response = await sync_view(request, *args, **kwargs)
+            return response
+
+        async_view.__dict__.update(view.__dict__)
+        async_view.__name__ = view.__name__
+        return async_view
+
+    async def adispatch(
+        self,
+        request: HttpRequest,
+        actions: dict[str, str],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Optional[HttpResponseBase]:
+        if 'get' in actions and 'head' not in actions:
+            actions['head'] = actions['get']
+        action = actions.get((request.method or '').lower())
+        if action not in self.async_actions:
+            return None
+        self.action_map = actions
+        self.args = args
+        self.kwargs = kwargs
+        self.request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                await sync_to_async(self.perform_authentication)(self.request)
+            self.initial(self.request, *args, **kwargs)
+            response = await getattr(self, f'a{action}')(
+                self.request,
+                *args,
+                **kwargs,
+            )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        if response is None:
+            return None
+        return self.finalize_response(
+            self.request,
+            response,
+            *args,
+            **kwargs,
+        )
+
+
+class ConditionalGetMixin(
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    def list(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        return self.conditional_response(
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        return self.conditional_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def get_etag_state(self) -> Iterable[Hashable]:
+        raise NotImplementedError(
+            'Conditional view requires .get_etag_state() to be implemented'
+        )
+
+    async def aget_etag_state(self) -> Iterable[Hashable]:
+        raise NotImplementedError(
+            'Async conditional view requires .aget_etag_state() '
+            'to be implemented'
+        )
+
+    def get_etag(self, request: Request) -> str:
+        return self.make_etag(request, self.get_etag_state())
+
+    async def aget_etag(self, request: Request) -> str:
+        return self.make_etag(request, await self.aget_etag_state())
+
+    def make_etag(self, request: Request, state: Iterable[Hashable]) -> str:
+        state = (
+            self.__class__.__name__,
+            self.action,
+            request.user.pk,
+            request.accepted_media_type,
+            request.get_full_path(),
+            *state,
+        )
+        return quote_etag(hashlib.md5(repr(state).encode()).hexdigest())
+
+    def conditional_response(
+        self,
+        handler: Callable,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        etag = self.get_etag(request)
+        response = self.get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+        return self.set_etag(handler(request, *args, **kwargs), etag)
+
+    def get_not_modified_response(
+        self,
+        request: Request,
+        etag: str,
+    ) -> Optional[HttpResponseBase]:
+        response = get_conditional_response(request, etag=etag)
+        if isinstance(response, HttpResponseNotModified):
+            response['ETag'] = etag
+        return response
+
+    def set_etag(
+        self,
+        response: HttpResponseBase,
+        etag: str,
+    ) -> HttpResponseBase:
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    async def aretrieve(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Optional[HttpResponseBase]:
+        etag = await self.aget_etag(request)
+        response = self.get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+        return self.set_etag(
+            await self.aretrieve_response(request, *args, **kwargs),
+            etag,
+        )
+
+    async def aretrieve_response(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        return await sync_to_async(super().retrieve)(request, *args, **kwargs)
+
+
+class CachedResponseMixin(
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    cache_models: tuple[type[Model], ...] = ()
+    cache_timeout = None
+
+    def list(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    async def alist(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Optional[HttpResponseBase]:
+        return await self.acached_response(request)
+
+    async def aretrieve(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Optional[HttpResponseBase]:
+        return await self.acached_response(request)
+
+    def get_response_cache_key(self, request: Request) -> str:
+        return self.make_response_cache_key(
+            request,
+            [get_version(model) for model in self.cache_models],
+        )
+
+    async def aget_response_cache_key(self, request: Request) -> str:
+        return self.make_response_cache_key(
+            request,
+            [await aget_version(model) for model in self.cache_models],
+        )
+
+    def make_response_cache_key(
+        self,
+        request: Request,
+        versions: Iterable[int],
+    ) -> str:
+        path = f'{request.accepted_media_type} {request.get_full_path()}'
+        return ':'.join(
+            (
+                'response',
+                self.__class__.__name__,
+                '.'.join(map(str, versions)),
+                hashlib.md5(path.encode()).hexdigest(),
+            )
+        )
+
+    def cached_response(
+        self,
+        handler: Callable,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                'last_modified': int(
+                    max(
+                        (get_modified(model) for model in self.cache_models),
+                        default=0,
+                    )
+                    or time.time()
+                ),
+            }
+            cache.set(key, cached, timeout=self.cache_timeout)
+        return self.cached_to_response(request, cached)
+
+    async def acached_response(
+        self,
+        request: Request,
+    ) -> Optional[HttpResponseBase]:
+        cached = await cache.aget(await self.aget_response_cache_key(request))
+        if cached is None:
+            return None
+        return self.cached_to_response(request, cached)
+
+    def cached_to_response(
+        self,
+        request: Request,
+        cached: dict,
+    ) -> HttpResponseBase:
+        response = HttpResponse(
+            cached['content'],
+            content_type=cached['content_type'],
+        )
+        response['ETag'] = cached['etag']
+        response['Last-Modified'] = http_date(cached['last_modified'])
+        return (
+            get_conditional_response(
+                request,
+                etag=cached['etag'],
+                last_modified=cached['last_modified'],
+                response=response,
+            )
+            or response
+        )
+
+
+class TimedRepresentationMixin(serializers.BaseSerializer):
+    def to_representation(self, instance: Any) -> Any:
+        return measure_representation(super().to_representation, instance)
@@ -1,5 +1,230 @@
+import base64
+import binascii
+from datetime import datetime
+from functools import reduce
+from operator import or_
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Func, Model, Q, QuerySet, Subquery
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
 
 
 class ResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RecipeFeedPagination(ResultsSetPagination):
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor.'
+    keyset = False
+
+    def is_keyset(self, request: Request) -> bool:
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def is_count_requested(self, request: Request) -> bool:
+        return request.query_params.get(self.count_query_param) in (
+            '1',
+            'true',
+        )
+
+    def get_ordering(self, queryset: QuerySet) -> tuple[str, ...]:
+        ordering = [
+            field
+            for field in queryset.query.order_by
+            or queryset.model._meta.ordering
+            if isinstance(field, str)
+        ]
+        if not {field.lstrip('-') for field in ordering} & {'id', 'pk'}:
+            ordering.append('-id')
+        return tuple(ordering)
+
+    def get_keyset_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+    ) -> tuple[QuerySet, bool, Optional[tuple]]:
+        self.ordering = self.get_ordering(queryset)
+        reverse, position = self.decode_cursor(request, queryset.model)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, position)
+            )
+        return queryset, reverse, position
+
+    def get_keyset_filter(
+        self,
+        ordering: tuple[str, ...],
+        position: tuple,
+    ) -> Q:
+        names = [field.lstrip('-') for field in ordering]
+        lookups = [
+            'lt' if field.startswith('-') else 'gt' for field in ordering
+        ]
+        after = reduce(
+            or_,
+            (
+                Q(
+                    *zip(names[:index], position[:index]),
+                    (f'{names[index]}__{lookups[index]}', position[index]),
+                )
+                for index in range(len(ordering))
+            ),
+        )
+        return Q((f'{names[0]}__{lookups[0]}e', position[0])) & after
+
+    def get_page_state(self, queryset: QuerySet, request: Request) -> tuple:
+        page_size = self.get_page_size(request)
+        if self.is_keyset(request):
+            keyset, _, _ = self.get_keyset_queryset(queryset, request)
+            state = tuple(
+                keyset.values_list('pk', 'updated_at')[: page_size + 1]
+            )
+            if self.is_count_requested(request):
+                state += (queryset.count(),)
+            return state
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            number = 0
+        if number < 1:
+            page = super().paginate_queryset(queryset, request) or []
+            return (
+                self.page.paginator.count,
+                *((item.pk, item.updated_at) for item in page),
+            )
+        start = (number - 1) * page_size
+        total = queryset.order_by().annotate(
+            total=Func(F('pk'), function='COUNT')
+        )
+        rows = queryset.annotate(total=Subquery(total.values('total')))
+        return tuple(
+            rows.values_list('total', 'pk', 'updated_at')[start:][:page_size]
+        )
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[list]:
+        self.keyset = self.is_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(),
+            self.page_query_param,
+        )
+        page_size = self.get_page_size(request)
+        self.count = None
+        if self.is_count_requested(request):
+            self.count = queryset.count()
+        queryset, reverse, position = self.get_keyset_queryset(
+            queryset,
+            request,
+        )
+        page = list(queryset[: page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+        self.next_position = self.previous_position = None
+        if page and (has_more if not reverse else position is not None):
+            self.next_position = self.get_position(page[-1])
+        if page and (has_more if reverse else position is not None):
+            self.previous_position = self.get_position(page[0])
+        return page
+
+    def get_position(self, item: Model) -> tuple:
+        return tuple(
+            getattr(item, field.lstrip('-')) for field in self.ordering
+        )
+
+    def encode_cursor(self, reverse: bool, position: tuple) -> str:
+        cursor = ','.join(
+            (
+                f'{reverse:d}',
+                *(
+                    value.isoformat()
+                    if isinstance(value, datetime)
+                    else str(value)
+                    for value in position
+                ),
+            )
+        )
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(cursor.encode()).decode(),
+        )
+
+    def decode_cursor(
+        self,
+        request: Request,
+        model: type[Model],
+    ) -> tuple[bool, Optional[tuple]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            reverse, *values = (
+                base64.urlsafe_b64decode(encoded.encode()).decode().split(',')
+            )
+            if len(values) != len(self.ordering):
+                raise ValueError(encoded)
+            fields = {field.name: field for field in model._meta.fields}
+            return bool(int(reverse)), tuple(
+                fields[field.lstrip('-')].to_python(value)
+                for field, value in zip(self.ordering, values)
+            )
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(False, self.next_position)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(True, self.previous_position)
+
+    def get_paginated_response(self, data: list) -> Response:
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response: dict[str, Any] = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
@@ -1,8 +1,19 @@
 import csv
-import io
+from typing import (
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    TypeVar,
+)
 
+from asgiref.sync import sync_to_async
 from rest_framework import renderers
 
+from api.documents import PDFWriter, stream_xlsx
+from api.fonts import get_pdf_font
+
 FILE_HEADERS = (
     'id',
     'name',
@@ -10,35 +21,103 @@ FILE_HEADERS = (
     'measurement_unit',
 )
 
+Chunk = TypeVar('Chunk', str, bytes)
+
+
+def ordered_values(data: Iterable[Mapping]) -> Iterator[tuple]:
+    for item in data:
+        yield tuple(item[header] for header in FILE_HEADERS)
+
+
+async def async_chunks(chunks: Iterator[Chunk]) -> AsyncIterator[Chunk]:
+    def next_chunk() -> Optional[Chunk]:
+        return next(chunks, None)
+
+    pull = sync_to_async(next_chunk, thread_sensitive=True)
+    while (chunk := await pull()) is not None:
+        yield chunk
+
+
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+class RecipeDataRenderer(renderers.BaseRenderer):
+    chunk_size = 64 * 1024
+
+    def lines(self, data: Iterable[Mapping]) -> Iterator[str]:
+        raise NotImplementedError(
+            'Renderer class requires .lines() to be implemented'
+        )
+
+    def stream(self, data: Iterable[Mapping]) -> Iterator[str]:
+        chunk, chunk_length = [], 0
+        for line in self.lines(data):
+            chunk.append(line)
+            chunk_length += len(line)
+            if chunk_length >= self.chunk_size:
+                yield ''.join(chunk)
+                chunk, chunk_length = [], 0
+        if chunk:
+            yield ''.join(chunk)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(self.lines(data))
+
 
-class CSVRecipeDataRenderer(renderers.BaseRenderer):
+class CSVRecipeDataRenderer(RecipeDataRenderer):
     media_type = "text/csv"
     format = "csv"
 
-    def render(self, data, accepted_media_type=None, renderer_context=None):
-        csv_buffer = io.StringIO()
+    def lines(self, data: Iterable[Mapping]) -> Iterator[str]:
         csv_writer = csv.DictWriter(
-            csv_buffer, fieldnames=FILE_HEADERS, extrasaction="ignore"
+            Echo(), fieldnames=FILE_HEADERS, extrasaction="ignore"
         )
-        csv_writer.writeheader()
+        yield csv_writer.writeheader()
 
         for item in data:
-            csv_writer.writerow(item)
-
-        return csv_buffer.getvalue()
+            yield csv_writer.writerow(item)
 
 
-class TextRecipeDataRenderer(renderers.BaseRenderer):
+class TextRecipeDataRenderer(RecipeDataRenderer):
     media_type = "text/plain"
     format = "txt"
 
-    def render(self, data, accepted_media_type=None, renderer_context=None):
-        text_buffer = io.StringIO()
-        text_buffer.write(' '.join(header for header in FILE_HEADERS) + '\n')
+    def lines(self, data: Iterable[Mapping]) -> Iterator[str]:
+        yield ' '.join(header for header in FILE_HEADERS) + '\n'
 
         for item in data:
-            text_buffer.write(
-                ' '.join(str(values) for values in list(item.values())) + '\n'
-            )
+            yield ' '.join(str(item[header]) for header in FILE_HEADERS) + '\n'
+
 
-        return text_buffer.getvalue()
+class PDFRecipeDataRenderer(renderers.BaseRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
+    render_style = "binary"
+    column_offsets = (0, 50, 380, 440)
+
+    def stream(self, data: Iterable[Mapping]) -> Iterator[bytes]:
+        return PDFWriter(get_pdf_font(), self.column_offsets).stream(
+            FILE_HEADERS,
+            ordered_values(data),
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(self.stream(data))
+
+
+class XLSXRecipeDataRenderer(renderers.BaseRenderer):
+    media_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    format = "xlsx"
+    charset = None
+    render_style = "binary"
+
+    def stream(self, data: Iterable[Mapping]) -> Iterator[bytes]:
+        return stream_xlsx(FILE_HEADERS, ordered_values(data))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(self.stream(data))
@@ -1,14 +1,23 @@
-from typing import OrderedDict
+from typing import Optional, OrderedDict
 
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import default_storage
 from django.db import transaction
-from django.db.models import Model, QuerySet
+from django.db.models import (
+    Model,
+    Prefetch,
+    QuerySet,
+    prefetch_related_objects,
+)
 from django.utils.functional import cached_property
 from djoser.serializers import UserCreateSerializer as UserCreateBaseSerializer
 from djoser.serializers import UserSerializer as UserBaseSerializer
 from rest_framework import serializers
+from rest_framework.request import Request
 
-from api.fields import Base64ImageField
+from api.fields import Base64ImageField, BulkPrimaryKeyRelatedField
+from api.mixins import TimedRepresentationMixin
+from recipes.images import get_variant_names
 from recipes.models import (
     Cart,
     Favorite,
@@ -19,6 +28,7 @@ from recipes.models import (
     Tag,
 )
 
+MAX_BATCH_SIZE = 100
 EXTRA_FIELDS = (
     'username',
     'first_name',
@@ -26,8 +36,19 @@ EXTRA_FIELDS = (
 )
 
 
-class RecipeMinifiedSerializer(serializers.ModelSerializer):
+def get_recipes_limit(request: Request) -> Optional[int]:
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is not None and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+class RecipeMinifiedSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -35,12 +56,23 @@ class RecipeMinifiedSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time',
         )
         read_only_fields = ('id',)
 
+    def get_image_variants(self, obj: Recipe) -> dict[str, Optional[str]]:
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in get_variant_names(obj).items():
+            url = name and default_storage.url(name)
+            if url and request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant] = url
+        return urls
 
-class UsersSerializer(UserBaseSerializer):
+
+class UsersSerializer(TimedRepresentationMixin, UserBaseSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta(UserBaseSerializer.Meta):
@@ -51,6 +83,8 @@ class UsersSerializer(UserBaseSerializer):
         )
 
     def get_is_subscribed(self, obj: AbstractUser) -> bool:
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return obj.subscribe.filter(
             user=self.context['request'].user.pk
         ).exists()
@@ -64,7 +98,7 @@ class UserCreateSerializer(UserCreateBaseSerializer):
         )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = (
@@ -76,7 +110,10 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
     class Meta:
         model = Ingredient
         fields = (
@@ -90,11 +127,29 @@ class IngredientSerializer(serializers.ModelSerializer):
         )
 
 
+class IngredientInRecipeListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data) -> list[OrderedDict]:
+        recipe_ingredients = super().to_internal_value(data)
+        ingredients_ids = [
+            recipe_ingredient['ingredient']['id']
+            for recipe_ingredient in recipe_ingredients
+        ]
+        ingredients = Ingredient.objects.in_bulk(set(ingredients_ids))
+        missing = sorted(set(ingredients_ids) - ingredients.keys())
+        if missing:
+            raise serializers.ValidationError(
+                'Ingredients with ids '
+                f'{", ".join(str(pk) for pk in missing)} do not exist.'
+            )
+        for recipe_ingredient in recipe_ingredients:
+            recipe_ingredient['ingredient'] = ingredients[
+                recipe_ingredient['ingredient']['id']
+            ]
+        return recipe_ingredients
+
+
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        source='ingredient',
-        queryset=Ingredient.objects.all(),
-    )
+    id = serializers.IntegerField(source='ingredient.id', min_value=1)
     name = serializers.CharField(
         source='ingredient.name',
         read_only=True,
@@ -106,6 +161,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = IngredientInRecipe
+        list_serializer_class = IngredientInRecipeListSerializer
         fields = (
             'id',
             'name',
@@ -119,7 +175,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 
 
 class RecipeSerializer(RecipeMinifiedSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
     )
@@ -142,19 +198,20 @@ class RecipeSerializer(RecipeMinifiedSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
+            'favorites_count',
+            'carts_count',
         )
         read_only_fields = (
             'id',
             'tags',
             'author',
+            'favorites_count',
+            'carts_count',
         )
 
-    @cached_property
-    def _ingredients(self) -> QuerySet:
-        return Ingredient.objects.all()
-
     @cached_property
     def _ingredients_in_recipe(self) -> QuerySet:
         return IngredientInRecipe.objects.all()
@@ -164,11 +221,15 @@ class RecipeSerializer(RecipeMinifiedSerializer):
         return Tag.objects.all()
 
     def get_is_favorited(self, obj) -> bool:
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return obj.favorite.filter(
             author=self.context['request'].user.pk
         ).exists()
 
     def get_is_in_shopping_cart(self, obj) -> bool:
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return obj.cart.filter(author=self.context['request'].user.pk).exists()
 
     def validate(self, attrs: OrderedDict) -> OrderedDict:
@@ -188,11 +249,6 @@ class RecipeSerializer(RecipeMinifiedSerializer):
                 'Repeating ingredients in the same recipe is unacceptable.'
             )
 
-        if not self._ingredients.filter(pk__in=ingredients_ids).exists():
-            raise serializers.ValidationError(
-                'The ingredient does not exists.'
-            )
-
         tags = attrs.get('tags')
         if not tags:
             raise serializers.ValidationError(
@@ -205,55 +261,92 @@ class RecipeSerializer(RecipeMinifiedSerializer):
             )
         return attrs
 
+    def set_ingredients(
+        self,
+        instance: Model,
+        recipe_ingredients: list[OrderedDict],
+        created: bool = False,
+    ) -> None:
+        amounts = {
+            recipe_ingredient['ingredient'].pk: recipe_ingredient['amount']
+            for recipe_ingredient in recipe_ingredients
+        }
+        existing = {}
+        if not created:
+            existing = {
+                recipe_ingredient.ingredient_id: recipe_ingredient
+                for recipe_ingredient in self._ingredients_in_recipe.filter(
+                    recipe=instance
+                )
+            }
+        changed = []
+        for ingredient_id, recipe_ingredient in existing.items():
+            amount = amounts.get(ingredient_id, recipe_ingredient.amount)
+            if recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        self._ingredients_in_recipe.bulk_create(
+            [
+                IngredientInRecipe(
+                    recipe_id=instance.pk,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for ingredient_id, amount in amounts.items()
+                if ingredient_id not in existing
+            ]
+        )
+        if changed:
+            self._ingredients_in_recipe.bulk_update(changed, ('amount',))
+        removed = existing.keys() - amounts.keys()
+        if removed:
+            self._ingredients_in_recipe.filter(
+                recipe=instance,
+                ingredient_id__in=removed,
+            ).delete()
+
     def create(self, validated_data: dict) -> Model:
         request = self.context['request']
         tags = validated_data.pop('tags')
-        validated_data.pop('ingredientinrecipe')
+        recipe_ingredients = validated_data.pop('ingredientinrecipe')
         with transaction.atomic():
             instance = self.Meta.model.objects.create(
                 author=request.user,
                 **validated_data,
             )
-            instance.ingredientinrecipe.set(
-                [
-                    self._ingredients_in_recipe.create(
-                        ingredient_id=ingredient['id'],
-                        amount=ingredient['amount'],
-                        recipe=instance,
-                    )
-                    for ingredient in request.data.get('ingredients')
-                ]
-            )
+            self.set_ingredients(instance, recipe_ingredients, created=True)
             instance.tags.set(tags)
         return instance
 
     def update(self, instance: Model, validated_data: dict) -> Model:
-        request_data = self.context['request'].data
-
-        validated_data.pop('ingredientinrecipe')
+        recipe_ingredients = validated_data.pop('ingredientinrecipe')
         with transaction.atomic():
-            for ingredient in request_data.get('ingredients'):
-                (
-                    recipe_ingredient,
-                    _,
-                ) = self._ingredients_in_recipe.update_or_create(
-                    recipe=instance,
-                    ingredient_id=ingredient['id'],
-                    defaults={
-                        'amount': ingredient.get('amount'),
-                        'ingredient_id': ingredient.get('id'),
-                        'recipe': instance,
-                    },
-                )
+            self.set_ingredients(instance, recipe_ingredients)
 
             tags = validated_data.get('tags')
             if tags:
                 instance.tags.set(tags)
                 validated_data.pop('tags')
 
-        return super().update(instance, validated_data)
+            instance = super().update(instance, validated_data)
+        return instance
+
+    def prefetch_related(self, instance: Model) -> Model:
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                'ingredientinrecipe',
+                queryset=self._ingredients_in_recipe.select_related(
+                    'ingredient'
+                ),
+            ),
+            'tags',
+        )
+        return instance
 
     def to_representation(self, instance: Model) -> OrderedDict:
+        if not getattr(instance, '_prefetched_objects_cache', None):
+            self.prefetch_related(instance)
         representation = super().to_representation(instance)
         representation['tags'] = TagSerializer(
             instance.tags.all(),
@@ -263,7 +356,10 @@ class RecipeSerializer(RecipeMinifiedSerializer):
         return representation
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
     name = serializers.CharField(source='recipe.name', required=False)
     image = Base64ImageField(source='recipe.image', required=False)
     cooking_time = serializers.IntegerField(
@@ -296,6 +392,26 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class RecipeBatchSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE,
+    )
+
+    def validate_recipes(self, value: list[int]) -> list[int]:
+        return list(dict.fromkeys(value))
+
+    def validate(self, attrs: OrderedDict) -> OrderedDict:
+        attrs['existing'] = set(
+            Recipe.objects.filter(pk__in=attrs['recipes']).values_list(
+                'pk',
+                flat=True,
+            )
+        )
+        return attrs
+
+
 class UserWithRecipesSerializer(UsersSerializer):
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
@@ -308,23 +424,27 @@ class UserWithRecipesSerializer(UsersSerializer):
         )
 
     def get_recipes(self, obj: AbstractUser) -> list[dict]:
-        recipes_limit = self.context.get('request').query_params.get(
-            'recipes_limit'
-        )
-        if recipes_limit is not None and recipes_limit.isdigit():
-            recipes_limit = int(recipes_limit)
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
         else:
-            recipes_limit = None
+            recipes = obj.recipe.all()[
+                : get_recipes_limit(self.context['request'])
+            ]
         return RecipeMinifiedSerializer(
-            obj.recipe.all()[:recipes_limit],
+            recipes,
             many=True,
         ).data
 
     def get_recipes_count(self, obj: AbstractUser) -> int:
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipe.count()
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(
+    TimedRepresentationMixin,
+    serializers.ModelSerializer,
+):
     class Meta:
         model = Subscribe
         fields = (
@@ -355,20 +475,3 @@ class CartSerializer(FavoriteSerializer):
     class Meta:
         model = Cart
         fields = FavoriteSerializer.Meta.fields
-
-
-class CheckListSerializer(serializers.Serializer):
-    id = serializers.IntegerField(source='ingredientinrecipe__ingredient')
-    name = serializers.CharField(source='ingredientinrecipe__ingredient__name')
-    measurement_unit = serializers.CharField(
-        source='ingredientinrecipe__ingredient__measurement_unit',
-    )
-    amount = serializers.IntegerField(source='total_amount')
-
-    class Meta:
-        fields = (
-            'id',
-            'name',
-            'measurement_unit',
-            'amount',
-        )
@@ -13,6 +13,20 @@ router.register('recipes', views.RecipeViewSet, basename='recipes')
 router.register('ingredients', views.IngredientViewSet, basename='ingredient')
 
 urlpatterns = [
+    path(
+        'recipes/favorite/',
+        views.FavoriteViewSet.as_view(
+            {'post': 'create_batch', 'delete': 'destroy_batch'}
+        ),
+        name='favorite-batch',
+    ),
+    path(
+        'recipes/shopping_cart/',
+        views.CartViewSet.as_view(
+            {'post': 'create_batch', 'delete': 'destroy_batch'}
+        ),
+        name='cart-batch',
+    ),
     path('', include(router.urls)),
     path(
         'recipes/<int:recipe_id>/favorite/',
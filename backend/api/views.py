@@ -1,4 +1,19 @@
-from django.db.models import QuerySet, Sum
+from typing import Any, Hashable, Iterable
+
+from django.conf import settings as django_settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    Model,
+    OuterRef,
+    Prefetch,
+    QuerySet,
+    Sum,
+    Value,
+)
+from django.http import Http404, HttpResponseBase, StreamingHttpResponse
 from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.conf import settings
@@ -17,14 +32,66 @@ from rest_framework.serializers import ModelSerializer, ValidationError
 
 from api import filters, serializers
 from api.filters import RecipeFilterSet
+from api.mixins import (
+    AsyncReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    auser_state,
+    queryset_state,
+    user_state,
+)
+from api.paginators import RecipeFeedPagination
 from api.permissions import IsAuthor, IsAuthorOrReadOnly
-from api.renderers import CSVRecipeDataRenderer, TextRecipeDataRenderer
-from recipes.models import Ingredient, Recipe, Tag, User
+from api.renderers import (
+    CSVRecipeDataRenderer,
+    PDFRecipeDataRenderer,
+    TextRecipeDataRenderer,
+    XLSXRecipeDataRenderer,
+    async_chunks,
+)
+from recipes.cache import aget_version, get_version
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    Recipe,
+    Subscribe,
+    Tag,
+    User,
+)
+from recipes.search import get_ingredient_index
 
 
-class UserViewSet(UserBaseViewSet):
+class UserViewSet(ConditionalGetMixin, UserBaseViewSet):
     queryset = User.objects.all().order_by('date_joined')
 
+    def get_etag_state(self) -> Iterable[Hashable]:
+        state = (
+            get_version(User),
+            *user_state(self.request.user, ((Subscribe, 'user'),)),
+        )
+        if self.action == 'subscriptions':
+            state += queryset_state(
+                Recipe.objects.filter(
+                    author__subscribe__user=self.request.user,
+                ),
+                'updated_at',
+            )
+        return state
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return queryset.annotate(
+                is_subscribed=Exists(
+                    Subscribe.objects.filter(
+                        author=OuterRef('pk'),
+                        user=self.request.user.pk,
+                    )
+                )
+            )
+        return queryset
+
     def get_permissions(self) -> list[BasePermission]:
         if (
             self.action == 'me'
@@ -39,8 +106,26 @@ class UserViewSet(UserBaseViewSet):
         return get_object_or_404(User, pk=self.kwargs.get('id'))
 
     @action(methods=('GET',), detail=False)  # type: ignore
-    def subscriptions(self, request: Request) -> Response:
-        subscriptions = self.queryset.filter(subscribe__user=request.user)
+    def subscriptions(self, request: Request) -> HttpResponseBase:
+        return self.conditional_response(self.list_subscriptions, request)
+
+    def list_subscriptions(self, request: Request) -> Response:
+        subscriptions = (
+            self.queryset.filter(subscribe__user=request.user)
+            .annotate(
+                is_subscribed=Value(True),
+                recipes_count=Count('recipe'),
+            )
+            .prefetch_related(
+                Prefetch(
+                    'recipe',
+                    queryset=Recipe.objects.all()[
+                        : serializers.get_recipes_limit(request)
+                    ],
+                    to_attr='limited_recipes',
+                )
+            )
+        )
         page = self.paginate_queryset(subscriptions)
         if page is not None:
             serializer = serializers.UserWithRecipesSerializer(
@@ -80,57 +165,174 @@ class UserViewSet(UserBaseViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    AsyncReadMixin,
+    CachedResponseMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    cache_models = (Tag,)
     pagination_class = None
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Tag.objects.all().order_by('id')
     serializer_class = serializers.TagSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    AsyncReadMixin,
+    CachedResponseMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    cache_models = (Ingredient,)
     pagination_class = None
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Ingredient.objects.all().order_by('id')
     serializer_class = serializers.IngredientSerializer
     filter_backends = (filters.IngredientSearchFilter,)
-    search_fields = ('^name',)
+
+    def list(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        if not django_settings.INGREDIENT_SEARCH_INDEX:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            self.list_from_index,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def list_from_index(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Response:
+        index = get_ingredient_index()
+        search_filter = filters.IngredientSearchFilter
+        name = request.query_params.get(search_filter.search_param, '').strip()
+        if not name:
+            return Response(index.all())
+        return Response(index.search(name, search_filter.max_results))
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    AsyncReadMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
-    queryset = Recipe.objects.all().order_by('-pub_date')
+    queryset = Recipe.objects.all().order_by('-pub_date', '-id')
     serializer_class = serializers.RecipeSerializer
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = RecipeFeedPagination
+    filter_backends = (DjangoFilterBackend, filters.RecipeOrderingFilter)
     filterset_class = RecipeFilterSet
+    ordering_fields = ('pub_date', 'favorites_count', 'carts_count')
     filterset_fields = (
         'author',
         'tags',
         'is_favorited',
         'is_in_shopping_cart',
     )
+    etag_models: tuple[type[Model], ...] = (Ingredient, Tag, User)
+    etag_relations: tuple[tuple[type[Model], str], ...] = (
+        (Favorite, 'author'),
+        (Cart, 'author'),
+        (Subscribe, 'user'),
+    )
+    async_actions = ('retrieve',)
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return queryset.with_related(self.request.user)
+        return queryset
+
+    def get_etag_state(self) -> Iterable[Hashable]:
+        recipes = Recipe.objects.all()
+        if self.action == 'list':
+            state = self.paginator.get_page_state(
+                self.filter_queryset(recipes),
+                self.request,
+            )
+        else:
+            state = tuple(self.get_recipe_state_query())
+        return (
+            *state,
+            *user_state(self.request.user, self.etag_relations),
+            *(get_version(model) for model in self.etag_models),
+        )
+
+    async def aget_etag_state(self) -> Iterable[Hashable]:
+        return (
+            *[
+                updated_at
+                async for updated_at in self.get_recipe_state_query()
+            ],
+            *await auser_state(self.request.user, self.etag_relations),
+            *[await aget_version(model) for model in self.etag_models],
+        )
+
+    def get_recipe_state_query(self) -> QuerySet:
+        try:
+            return Recipe.objects.filter(
+                pk=self.kwargs['pk'],
+            ).values_list('updated_at', flat=True)
+        except (TypeError, ValueError, DjangoValidationError):
+            return Recipe.objects.none()
+
+    async def aretrieve_response(
+        self,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        if request.query_params:
+            return await super().aretrieve_response(request, *args, **kwargs)
+        try:
+            recipe = await self.get_queryset().aget(pk=self.kwargs['pk'])
+        except (
+            Recipe.DoesNotExist,
+            TypeError,
+            ValueError,
+            DjangoValidationError,
+        ):
+            raise Http404
+        self.check_object_permissions(request, recipe)
+        return Response(self.get_serializer(recipe).data)
 
     @action(
         methods=('GET',),
         detail=False,
-        renderer_classes=(CSVRecipeDataRenderer, TextRecipeDataRenderer),
+        renderer_classes=(
+            CSVRecipeDataRenderer,
+            TextRecipeDataRenderer,
+            PDFRecipeDataRenderer,
+            XLSXRecipeDataRenderer,
+        ),
     )  # type: ignore
-    def download_shopping_cart(self, request: Request) -> Response:
-        queryset = self.get_queryset().filter(cart__author=request.user)
-        serializer = serializers.CheckListSerializer(
-            queryset.values(
-                'ingredientinrecipe__ingredient',
-                'ingredientinrecipe__ingredient__name',
-                'ingredientinrecipe__ingredient__measurement_unit',
+    def download_shopping_cart(self, request: Request) -> HttpResponseBase:
+        ingredients = (
+            Ingredient.objects.filter(
+                ingredientinrecipe__recipe__cart__author=request.user,
             )
-            .order_by('ingredientinrecipe__ingredient')
-            .annotate(total_amount=Sum('ingredientinrecipe__amount')),
-            many=True,
+            .values('id', 'name', 'measurement_unit')
+            .annotate(amount=Sum('ingredientinrecipe__amount'))
+            .order_by('id')
         )
-        file_name = (
-            f'recipes_from_shopping_cart.{request.accepted_renderer.format}'
-        )
-        return Response(
-            serializer.data,
+        renderer = request.accepted_renderer
+        file_name = f'recipes_from_shopping_cart.{renderer.format}'
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        chunks = renderer.stream(ingredients.iterator())
+        if django_settings.ASGI:
+            chunks = async_chunks(chunks)
+        return StreamingHttpResponse(
+            chunks,
+            content_type=content_type,
             headers={
                 'Content-Disposition': f'attachment; filename="{file_name}"'
             },
@@ -145,6 +347,7 @@ class FavoriteViewSet(
     permission_classes = (IsAuthor, IsAuthenticated)
     serializer_class = serializers.FavoriteSerializer
     lookup_field = 'recipe_id'
+    counter_field = 'favorites_count'
 
     @cached_property
     def _recipe(self) -> QuerySet:
@@ -158,11 +361,24 @@ class FavoriteViewSet(
         serializer_context['kwargs'] = self.kwargs
         return serializer_context
 
+    @transaction.atomic
     def perform_create(self, serializer: ModelSerializer) -> None:
         serializer.save(
             recipe=self._recipe,
             author=self.request.user,
         )
+        Recipe.objects.filter(pk=self._recipe.pk).shift_counter(
+            self.counter_field,
+            1,
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance: Model) -> None:
+        instance.delete()
+        Recipe.objects.filter(pk=self._recipe.pk).shift_counter(
+            self.counter_field,
+            -1,
+        )
 
     def destroy(
         self,
@@ -174,9 +390,62 @@ class FavoriteViewSet(
             raise ValidationError('The object is not exists.')
         return super().destroy(request, *args, **kwargs)
 
+    def get_batch(self, request: Request) -> tuple[list[int], set[int]]:
+        serializer = serializers.RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return (
+            serializer.validated_data['recipes'],
+            serializer.validated_data['existing'],
+        )
+
+    @transaction.atomic
+    def create_batch(self, request: Request) -> Response:
+        recipes, existing = self.get_batch(request)
+        model = self.serializer_class.Meta.model
+        present = set(
+            model.objects.filter(
+                author=request.user,
+                recipe__in=existing,
+            ).values_list('recipe', flat=True)
+        )
+        added = existing - present
+        model.objects.bulk_create(
+            (model(author=request.user, recipe_id=pk) for pk in added),
+            ignore_conflicts=True,
+        )
+        Recipe.objects.filter(pk__in=existing).reconcile_counters()
+        statuses = {pk: 'created' for pk in added}
+        statuses.update((pk, 'exists') for pk in present)
+        return Response(
+            [
+                {'id': pk, 'status': statuses.get(pk, 'not_found')}
+                for pk in recipes
+            ]
+        )
+
+    @transaction.atomic
+    def destroy_batch(self, request: Request) -> Response:
+        recipes, existing = self.get_batch(request)
+        rows = self.serializer_class.Meta.model.objects.filter(
+            author=request.user,
+            recipe__in=existing,
+        )
+        removed = set(rows.values_list('recipe', flat=True))
+        rows.delete()
+        Recipe.objects.filter(pk__in=existing).reconcile_counters()
+        statuses = {pk: 'absent' for pk in existing}
+        statuses.update((pk, 'deleted') for pk in removed)
+        return Response(
+            [
+                {'id': pk, 'status': statuses.get(pk, 'not_found')}
+                for pk in recipes
+            ]
+        )
+
 
 class CartViewSet(FavoriteViewSet):
     serializer_class = serializers.CartSerializer
+    counter_field = 'carts_count'
 
     def get_queryset(self) -> QuerySet:
         return self._recipe.cart.filter(author=self.request.user).all()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import threading
+import time
+from typing import Any, Callable
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import DEFAULT_DB_ALIAS, connection, connections  # noqa: E402
+
+BASE = dict(connections.settings[DEFAULT_DB_ALIAS])
+MODES: dict[str, dict[str, Any]] = {
+    'per request': {'CONN_MAX_AGE': 0},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'pool': {
+        'ENGINE': 'foodgram.backends.postgresql',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4}},
+    },
+}
+
+sessions: set[int] = set()
+
+
+def handle_request() -> None:
+    request_started.send(sender=None)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        sessions.add(cursor.fetchone()[0])
+    request_finished.send(sender=None)
+
+
+def in_new_thread() -> None:
+    thread = threading.Thread(target=handle_request)
+    thread.start()
+    thread.join()
+
+
+def configure(overrides: dict) -> None:
+    connections.close_all()
+    connections.settings[DEFAULT_DB_ALIAS] = {**BASE, **overrides}
+    del connections[DEFAULT_DB_ALIAS]
+
+
+def measure(request: Callable, requests: int) -> tuple[float, int]:
+    request()
+    sessions.clear()
+    started = time.perf_counter()
+    for _ in range(requests):
+        request()
+    return (time.perf_counter() - started) / requests * 1000, len(sessions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Per-request database connection overhead.',
+    )
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--modes', nargs='+', default=list(MODES))
+    args = parser.parse_args()
+    print(f'{"mode":<12} {"threads":<12} {"ms/request":>10} {"sessions":>9}')
+    for mode in args.modes:
+        configure(MODES[mode])
+        for threads, request in (
+            ('worker', handle_request),
+            ('per request', in_new_thread),
+        ):
+            elapsed, count = measure(request, args.requests)
+            print(f'{mode:<12} {threads:<12} {elapsed:>10.3f} {count:>9}')
+    connections.close_all()
+
+
+if __name__ == '__main__':
+    main()
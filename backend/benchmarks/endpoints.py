@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, models  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from recipes.models import (  # noqa: E402
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    Subscribe,
+    Tag,
+    User,
+)
+
+PREFIX = 'bench'
+IMAGE = f'{settings.IMAGE_PATH}/{PREFIX}.jpg'
+INGREDIENTS_FILE = settings.BASE_DIR.parent / 'data' / 'ingredients.csv'
+VOLUMES = {
+    'users': 100_000,
+    'recipes': 1_000_000,
+    'ingredients_per_recipe': 10,
+    'tags': 8,
+    'subscriptions_per_user': 10,
+    'favorites_per_user': 20,
+    'carts_per_user': 5,
+}
+MODELS = (
+    User,
+    Tag,
+    Ingredient,
+    Recipe,
+    IngredientInRecipe,
+    Subscribe,
+    Favorite,
+    Cart,
+)
+
+
+def seed(args: argparse.Namespace) -> None:
+    volumes = {
+        name: max(1, int(value * args.scale))
+        if name in ('users', 'recipes')
+        else value
+        for name, value in VOLUMES.items()
+    }
+    print(f'Seeding {volumes}.')
+    if Ingredient.objects.count() < 100:
+        call_command('load_data', file=str(INGREDIENTS_FILE))
+    call_command(
+        'generate_data',
+        prefix=PREFIX,
+        image=IMAGE,
+        seed=args.seed,
+        **volumes,
+    )
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def get_scenarios() -> list[tuple[str, str, bool]]:
+    slugs = list(Tag.objects.order_by('pk').values_list('slug', flat=True)[:4])
+    tags = '&'.join(f'tags={slug}' for slug in slugs[:2])
+    all_tags = '&'.join(f'tags={slug}' for slug in slugs)
+    author = (
+        Recipe.objects.values('author')
+        .annotate(recipes=models.Count('pk'))
+        .order_by('-recipes')
+        .values_list('author', flat=True)
+        .first()
+    )
+    return [
+        ('recipes', '/api/recipes/?limit=6', False),
+        ('recipes?tag', f'/api/recipes/?limit=6&tags={slugs[0]}', False),
+        ('recipes?tags', f'/api/recipes/?limit=6&{tags}', False),
+        ('recipes?tags*4', f'/api/recipes/?limit=6&{all_tags}', False),
+        ('recipes?author', f'/api/recipes/?limit=6&author={author}', False),
+        ('recipes?is_favorited', '/api/recipes/?limit=6&is_favorited=1', True),
+        (
+            'recipes?is_favorited&tags',
+            f'/api/recipes/?limit=6&is_favorited=1&{tags}',
+            True,
+        ),
+        (
+            'recipes?is_in_shopping_cart',
+            '/api/recipes/?limit=6&is_in_shopping_cart=1',
+            True,
+        ),
+        (
+            'subscriptions',
+            '/api/users/subscriptions/?limit=6&recipes_limit=3',
+            True,
+        ),
+        (
+            'download_shopping_cart',
+            '/api/recipes/download_shopping_cart/?format=csv',
+            True,
+        ),
+        ('ingredients?name', '/api/ingredients/?name=сол', False),
+    ]
+
+
+def request(client: APIClient, path: str) -> int:
+    response = client.get(path)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def measure(
+    client: APIClient,
+    path: str,
+    requests: int,
+    prepare: Callable[[], None],
+) -> dict:
+    prepare()
+    with CaptureQueriesContext(connection) as context:
+        status = request(client, path)
+    queries = len(context)
+    latencies = []
+    for _ in range(requests):
+        prepare()
+        started = time.perf_counter()
+        request(client, path)
+        latencies.append(time.perf_counter() - started)
+    return {
+        'status': status,
+        'queries': queries,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rps': len(latencies) / sum(latencies),
+    }
+
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ('git', *args),
+            capture_output=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        ).stdout.strip()
+
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def print_results(results: dict) -> None:
+    print(
+        f'{"scenario":<28} {"status":>6} {"queries":>7} {"p50 ms":>8} '
+        f'{"p95 ms":>8} {"p99 ms":>8} {"rps":>8}'
+    )
+    for name, result in results.items():
+        print(
+            f'{name:<28} {result["status"]:>6} {result["queries"]:>7} '
+            f'{result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+            f'{result["p99_ms"]:>8.1f} {result["rps"]:>8.1f}'
+        )
+
+
+def run(args: argparse.Namespace) -> None:
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    user = (
+        User.objects.filter(username__startswith=PREFIX).order_by('pk').first()
+    )
+    if user is None:
+        print('No benchmark data, run the "seed" command first.')
+        return
+    anonymous, authenticated = APIClient(), APIClient()
+    authenticated.force_authenticate(user)
+    prepare = cache.clear if args.cold else lambda: None
+    results = {}
+    for name, path, needs_user in get_scenarios():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(
+            authenticated if needs_user else anonymous,
+            path,
+            args.requests,
+            prepare,
+        )
+    print_results(results)
+    report = {
+        **git_revision(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'cold': args.cold,
+        'rows': {model._meta.label: model.objects.count() for model in MODELS},
+        'results': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f'Report saved to {args.output}.')
+
+
+def compare(args: argparse.Namespace) -> None:
+    base, head = (
+        json.loads(Path(path).read_text()) for path in (args.base, args.head)
+    )
+    print(f'{base["commit"]} -> {head["commit"]}')
+    print(
+        f'{"scenario":<28} {"queries":>9} {"p50 ms":>17} {"p99 ms":>17} '
+        f'{"change":>7}'
+    )
+    for name, after in head['results'].items():
+        before: Optional[dict] = base['results'].get(name)
+        if before is None:
+            continue
+        change = (after['p50_ms'] / before['p50_ms'] - 1) * 100
+        print(
+            f'{name:<28} {before["queries"]:>4}->{after["queries"]:<4} '
+            f'{before["p50_ms"]:>8.1f}->{after["p50_ms"]:<8.1f} '
+            f'{before["p99_ms"]:>8.1f}->{after["p99_ms"]:<8.1f} '
+            f'{change:>+6.0f}%'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='API benchmark suite on a seeded database.',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    seed_parser = commands.add_parser('seed', help='Bulk load test data.')
+    seed_parser.add_argument(
+        '--scale',
+        type=float,
+        default=1.0,
+        help='Fraction of 100k users and 1M recipes to create.',
+    )
+    seed_parser.add_argument('--seed', type=int, default=0)
+    seed_parser.set_defaults(handler=seed)
+    run_parser = commands.add_parser('run', help='Measure the endpoints.')
+    run_parser.add_argument('--requests', type=int, default=50)
+    run_parser.add_argument(
+        '--cold',
+        action='store_true',
+        help='Clear the cache before every request.',
+    )
+    run_parser.add_argument('--only', nargs='+', help='Scenario names.')
+    run_parser.add_argument('-o', '--output', help='JSON report path.')
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser('compare', help='Diff two reports.')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(
+        line.lower().split(': ', 1) for line in lines[1:] if ': ' in line
+    )
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') != 'close'
+
+
+async def worker(
+    url: str,
+    headers: dict[str, str],
+    deadline: float,
+    latencies: list[float],
+    errors: list[int],
+) -> None:
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    request = ''.join(
+        (
+            f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n',
+            *(f'{name}: {value}\r\n' for name, value in headers.items()),
+            '\r\n',
+        )
+    ).encode()
+    writer = None
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname,
+                    parts.port or 80,
+                )
+            writer.write(request)
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run(
+    url: str,
+    headers: dict[str, str],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    latencies: list[float] = []
+    errors: list[int] = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker(url, headers, started + duration, latencies, errors)
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50': percentiles[49] * 1000,
+        'p99': percentiles[98] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Keep-alive GET load against running server endpoints.',
+    )
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('-c', '--concurrency', default=32, type=int)
+    parser.add_argument('-d', '--duration', default=10.0, type=float)
+    parser.add_argument(
+        '-H',
+        '--header',
+        action='append',
+        default=[],
+        help='Extra request header, e.g. "Authorization: Token ...".',
+    )
+    args = parser.parse_args()
+    headers = dict(header.split(': ', 1) for header in args.header)
+    print(
+        f'{"url":<48} {"requests":>9} {"rps":>9} {"p50 ms":>8} {"p99 ms":>8}'
+    )
+    for url in args.urls:
+        result = asyncio.run(
+            run(url, headers, args.concurrency, args.duration)
+        )
+        print(
+            f'{url:<48} {result["requests"]:>9} {result["rps"]:>9.1f} '
+            f'{result["p50"]:>8.1f} {result["p99"]:>8.1f}'
+            + (f'  errors: {result["errors"]}' if result['errors'] else '')
+        )
+
+
+if __name__ == '__main__':
+    main()
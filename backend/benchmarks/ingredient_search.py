@@ -0,0 +1,72 @@
+import argparse
+import os
+import random
+import time
+from typing import Callable
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from api.filters import IngredientSearchFilter  # noqa: E402
+from api.serializers import IngredientSerializer  # noqa: E402
+from recipes.models import Ingredient  # noqa: E402
+from recipes.search import IngredientIndex  # noqa: E402
+
+
+def orm_search(query: str) -> list:
+    request = Request(APIRequestFactory().get('/', {'name': query}))
+    queryset = IngredientSearchFilter().filter_queryset(
+        request,
+        Ingredient.objects.all(),
+        None,
+    )
+    return IngredientSerializer(queryset, many=True).data
+
+
+def timeit(search: Callable, queries: list[str]) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Ingredient autocomplete: ORM versus in-memory index.',
+    )
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = IngredientIndex.from_database()
+    build_time = time.perf_counter() - started
+    print(
+        f'Index: {len(index)} ingredients, built in {build_time:.2f}s, '
+        f'~{index.memory_usage() / 2**20:.1f} MiB.'
+    )
+    names = [name for _, name, _ in index.items]
+    if not names:
+        print('No ingredients to search, run load_data first.')
+        return
+    generator = random.Random(args.seed)
+    queries = [
+        name[: generator.randint(1, min(len(name), 6))]
+        for name in generator.choices(names, k=args.queries)
+    ]
+    limit = IngredientSearchFilter.max_results
+    print(f'ORM:   {timeit(orm_search, queries):8.2f} ms/query')
+    print(
+        'Index: '
+        f'{timeit(lambda query: index.search(query, limit), queries):8.2f} '
+        'ms/query'
+    )
+
+
+if __name__ == '__main__':
+    main()
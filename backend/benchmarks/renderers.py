@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+import tracemalloc
+from typing import Iterator
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.renderers import (  # noqa: E402
+    CSVRecipeDataRenderer,
+    PDFRecipeDataRenderer,
+    TextRecipeDataRenderer,
+    XLSXRecipeDataRenderer,
+)
+
+RENDERERS = (
+    CSVRecipeDataRenderer,
+    TextRecipeDataRenderer,
+    PDFRecipeDataRenderer,
+    XLSXRecipeDataRenderer,
+)
+SIZES = (10, 1_000, 100_000)
+
+
+def generate_rows(size: int) -> Iterator[dict]:
+    for number in range(size):
+        yield {
+            'id': number,
+            'name': f'ингредиент номер {number}',
+            'measurement_unit': 'г',
+            'amount': number % 1000 + 1,
+        }
+
+
+def consume(renderer_class: type, size: int) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    first_chunk = None
+    length = 0
+    for chunk in renderer_class().stream(generate_rows(size)):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        length += len(chunk)
+    return first_chunk or 0, time.perf_counter() - started, length
+
+
+def measure(renderer_class: type, size: int) -> tuple[float, float, int, int]:
+    first_chunk, elapsed, length = consume(renderer_class, size)
+    tracemalloc.start()
+    consume(renderer_class, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_chunk, elapsed, peak, length
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Shopping list renderers benchmark.',
+    )
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    args = parser.parse_args()
+    print(
+        f'{"format":<6} {"lines":>8} {"first, ms":>10} {"total, ms":>10} '
+        f'{"peak, KiB":>10} {"size, KiB":>10}'
+    )
+    for renderer_class in RENDERERS:
+        for size in args.sizes:
+            first_chunk, elapsed, peak, length = measure(renderer_class, size)
+            print(
+                f'{renderer_class.format:<6} {size:>8} '
+                f'{first_chunk * 1000:>10.1f} {elapsed * 1000:>10.1f} '
+                f'{peak / 1024:>10.0f} {length / 1024:>10.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+from foodgram.backends.postgresql.creation import DatabaseCreation
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError as exc:
+    raise ImproperlyConfigured(
+        'Connection pooling requires psycopg 3 and psycopg_pool, install '
+        'them with "pip install psycopg[binary,pool]".'
+    ) from exc
+
+
+if TYPE_CHECKING:
+
+    class BaseDatabaseWrapper(base.DatabaseWrapper):
+        def _close(self) -> None:
+            ...
+
+else:
+    BaseDatabaseWrapper = base.DatabaseWrapper
+
+
+class DatabaseWrapper(BaseDatabaseWrapper):
+    creation_class = DatabaseCreation
+    connection_pool: Optional[ConnectionPool] = None
+    _pools: dict[tuple[str, str], ConnectionPool] = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool_options(self) -> Optional[dict[str, Any]]:
+        return self.settings_dict['OPTIONS'].get('pool')
+
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        if not self.pool_options:
+            return None
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = self._pools.get(key)
+        if pool is not None:
+            return pool
+        if not is_psycopg3:
+            raise ImproperlyConfigured(
+                'Connection pooling requires psycopg 3, psycopg2 is in use.'
+            )
+        if self.settings_dict['CONN_MAX_AGE']:
+            raise ImproperlyConfigured(
+                'Pooled connections require CONN_MAX_AGE = 0.'
+            )
+        with self._pools_lock:
+            if key not in self._pools:
+                pool = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    open=False,
+                    name=self.alias,
+                    **self.pool_options,
+                )
+                pool.open()
+                self._pools[key] = pool
+            return self._pools[key]
+
+    def get_connection_params(self) -> dict[str, Any]:
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params: dict[str, Any]) -> Any:
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.getconn()
+        self.connection_pool = pool
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = base.IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self) -> None:
+        pool, self.connection_pool = self.connection_pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    @classmethod
+    def close_pools(cls) -> None:
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,22 @@
+from typing import TYPE_CHECKING
+
+from django.db.backends.postgresql import creation
+
+if TYPE_CHECKING:
+
+    class BaseDatabaseCreation(creation.DatabaseCreation):
+        def _destroy_test_db(
+            self, test_database_name: str, verbosity: int
+        ) -> None:
+            ...
+
+else:
+    BaseDatabaseCreation = creation.DatabaseCreation
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    def _destroy_test_db(
+        self, test_database_name: str, verbosity: int
+    ) -> None:
+        self.connection.close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
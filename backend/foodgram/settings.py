@@ -1,5 +1,7 @@
 import os
+import tempfile
 from pathlib import Path
+from typing import Any
 
 from dotenv import find_dotenv, load_dotenv
 
@@ -28,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -53,6 +56,23 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+REQUEST_METRICS = bool(os.getenv('REQUEST_METRICS', False))
+
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', 20))
+
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'api.middleware.RequestMetricsMiddleware')
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {'class': 'logging.StreamHandler'},
+        },
+        'loggers': {
+            'api.middleware': {'handlers': ['console'], 'level': 'INFO'},
+        },
+    }
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -73,8 +93,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI = bool(os.getenv('DJANGO_ASGI'))
 
-DATABASES = {
+
+DATABASES: dict[str, dict[str, Any]] = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
@@ -82,6 +104,39 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0 if ASGI else 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', '1').lower()
+            in ('1', 'true', 'yes')
+        ),
+    }
+}
+
+if os.getenv('DB_POOL_MAX_SIZE'):
+    DATABASES['default'].update(
+        {
+            'ENGINE': 'foodgram.backends.postgresql',
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+                    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+                },
+            },
+        }
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'DJANGO_CACHE_LOCATION',
+            Path(tempfile.gettempdir()).joinpath('foodgram_cache').as_posix(),
+        ),
     }
 }
 
@@ -159,4 +214,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = Path(BASE_DIR).joinpath('media').as_posix()
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'recipes.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 IMAGE_PATH = 'recipes/images'
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+IMAGE_VARIANTS: dict[str, dict[str, Any]] = {
+    'full': {'size': (1280, 1280), 'format': 'JPEG', 'quality': 85},
+    'card': {'size': (480, 480), 'format': 'WEBP', 'quality': 80},
+    'thumbnail': {'size': (160, 160), 'format': 'WEBP', 'quality': 75},
+}
+
+INGREDIENT_SEARCH_INDEX = bool(
+    os.environ.get('INGREDIENT_SEARCH_INDEX', False)
+)
+
+PDF_FONT_PATH = os.getenv(
+    'PDF_FONT_PATH',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
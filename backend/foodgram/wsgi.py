@@ -1,7 +1,13 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_wsgi_application()
+
+if settings.INGREDIENT_SEARCH_INDEX:
+    from recipes.search import warm_ingredient_index
+
+    warm_ingredient_index()
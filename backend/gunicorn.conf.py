@@ -0,0 +1,11 @@
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:9000')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if os.getenv('DJANGO_ASGI'):
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+    threads = int(os.getenv('GUNICORN_THREADS', 1))
@@ -1,8 +1,6 @@
 from django.contrib import admin
-from django.db.models import Model
 
 from recipes import models
-from recipes.models import Favorite
 
 
 @admin.register(models.Cart)
@@ -44,16 +42,19 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'name',
         'author',
-        'favorite_count',
+        'favorites_count',
+        'carts_count',
     )
     list_filter = (
         'author',
         'name',
         'tags',
     )
-
-    def favorite_count(self, instance: Model) -> int:
-        return Favorite.objects.filter(recipe=instance).count()
+    list_select_related = ('author',)
+    readonly_fields = (
+        'favorites_count',
+        'carts_count',
+    )
 
 
 @admin.register(models.Subscribe)
@@ -0,0 +1,43 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Model
+
+NANOSECONDS = 10**9
+
+
+def version_key(model: type[Model]) -> str:
+    return f'{model._meta.label_lower}:version'
+
+
+def get_version(model: type[Model]) -> int:
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(model: type[Model]) -> int:
+    key = version_key(model)
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def get_modified(model: type[Model]) -> float:
+    return get_version(model) / NANOSECONDS
+
+
+def bump_version(model: type[Model]) -> None:
+    key = version_key(model)
+    cache.set(
+        key,
+        max(time.time_ns(), cache.get(key, 0) + 1),
+        timeout=None,
+    )
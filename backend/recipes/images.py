@@ -0,0 +1,138 @@
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def variant_name(name: str, variant: str, image_format: str) -> str:
+    stem, _ = posixpath.splitext(posixpath.basename(name))
+    return posixpath.join(
+        settings.IMAGE_PATH,
+        f'{stem}_{variant}.{EXTENSIONS[image_format]}',
+    )
+
+
+def encode_variant(image: Image.Image, options: dict) -> bytes:
+    if options['format'] == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        options['format'],
+        quality=options.get('quality', 80),
+        optimize=options['format'] == 'JPEG',
+    )
+    return buffer.getvalue()
+
+
+def build_variants(name: str) -> dict[str, str]:
+    variants = sorted(
+        settings.IMAGE_VARIANTS.items(),
+        key=lambda item: item[1]['size'],
+        reverse=True,
+    )
+    names = {}
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.draft('RGB', variants[0][1]['size'])
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        for variant, options in variants:
+            image.thumbnail(options['size'], Image.LANCZOS)
+            names[variant] = default_storage.save(
+                variant_name(name, variant, options['format']),
+                ContentFile(encode_variant(image, options)),
+            )
+    return names
+
+
+def get_variant_names(recipe: Recipe) -> dict[str, Optional[str]]:
+    if not recipe.image:
+        return dict.fromkeys(settings.IMAGE_VARIANTS)
+    variants = {}
+    if recipe.image_variants.get('source') == recipe.image.name:
+        variants = recipe.image_variants
+    return {
+        variant: variants.get(variant, recipe.image.name)
+        for variant in settings.IMAGE_VARIANTS
+    }
+
+
+def process_recipe_image(recipe_id: int, force: bool = False) -> bool:
+    recipe = (
+        Recipe.objects.filter(pk=recipe_id)
+        .only('image', 'image_variants')
+        .first()
+    )
+    if recipe is None or not recipe.image:
+        return False
+    name = recipe.image.name
+    if not force and recipe.image_variants.get('source') == name:
+        return False
+    variants = None
+    if not force:
+        variants = (
+            Recipe.objects.filter(image=name, image_variants__source=name)
+            .values_list('image_variants', flat=True)
+            .first()
+        )
+    if variants is None:
+        try:
+            variants = {'source': name, **build_variants(name)}
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.exception(
+                'Image variants for recipe %s failed.',
+                recipe_id,
+            )
+            return False
+    return bool(
+        Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_variants=variants,
+            updated_at=Now(),
+        )
+    )
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+        return _executor
+
+
+def run_in_worker(recipe_id: int, force: bool = False) -> bool:
+    close_old_connections()
+    try:
+        return process_recipe_image(recipe_id, force)
+    finally:
+        connection.close()
+
+
+def schedule_recipe_image(recipe_id: int) -> Optional[Future]:
+    if settings.IMAGE_WORKERS <= 0:
+        process_recipe_image(recipe_id)
+        return None
+    return get_executor().submit(run_in_worker, recipe_id)
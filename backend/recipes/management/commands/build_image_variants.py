@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import F, Q
+from django.db.models.fields.json import KeyTextTransform
+
+from recipes import models
+from recipes.images import process_recipe_image, run_in_worker
+
+
+class Command(BaseCommand):
+    help = 'Build missing image variants of recipes.'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        del args
+        force = bool(options.get('force'))
+        workers = int(options.get('workers', settings.IMAGE_WORKERS))
+        started = time.monotonic()
+        recipes = models.Recipe.objects.exclude(image='').exclude(
+            image__isnull=True
+        )
+        if not force:
+            recipes = recipes.alias(
+                source=KeyTextTransform('source', 'image_variants')
+            ).filter(Q(source__isnull=True) | ~Q(source=F('image')))
+        recipe_ids = list(recipes.order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f'Processing {len(recipe_ids)} images.')
+        if workers <= 0:
+            results = [
+                process_recipe_image(recipe_id, force)
+                for recipe_id in recipe_ids
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(
+                        run_in_worker,
+                        recipe_ids,
+                        [force] * len(recipe_ids),
+                    )
+                )
+        built = sum(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done: variants built for {built} of {len(recipe_ids)} '
+                f'images in {time.monotonic() - started:.2f}s.'
+            )
+        )
+        if built < len(recipe_ids):
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(recipe_ids) - built} images were skipped, '
+                    'see the log for details.'
+                )
+            )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--workers',
+            action='store',
+            default=settings.IMAGE_WORKERS,
+            help='Number of worker threads, 0 to process inline.',
+            type=int,
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants that are already up to date.',
+        )
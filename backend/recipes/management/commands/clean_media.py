@@ -0,0 +1,61 @@
+from datetime import timedelta
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.files.storage import default_storage, storages
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from recipes import models
+from recipes.storage import walk
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe images that no recipe refers to.'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        del args
+        dry_run = bool(options.get('dry_run'))
+        threshold = timezone.now() - timedelta(
+            seconds=int(options.get('min_age', 3600))
+        )
+        referenced = set()
+        for image, variants in models.Recipe.objects.values_list(
+            'image',
+            'image_variants',
+        ).iterator():
+            referenced.add(image)
+            referenced.update(variants.values())
+        deleted = size = 0
+        names: Iterable[str] = ()
+        if default_storage.exists(settings.IMAGE_PATH):
+            names = walk(storages['default'], settings.IMAGE_PATH)
+        for name in names:
+            if name in referenced:
+                continue
+            if default_storage.get_modified_time(name) > threshold:
+                continue
+            size += default_storage.size(name)
+            deleted += 1
+            if not dry_run:
+                default_storage.delete(name)
+        action = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{action} {deleted} files, {size / 1024:.0f} KiB.'
+            )
+        )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--min-age',
+            action='store',
+            default=3600,
+            help='Keep unreferenced files younger than this many seconds.',
+            type=int,
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted.',
+        )
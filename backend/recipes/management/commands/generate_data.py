@@ -0,0 +1,519 @@
+import csv
+import io
+import json
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate, islice
+from typing import Any, Hashable, Iterable, Iterator, Optional, Sequence
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import JSONField, Max, Model
+from django.utils import timezone
+
+from recipes import models
+from recipes.cache import bump_version
+
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Олег', 'Елена', 'Павел', 'Ольга')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев')
+DISHES = ('суп', 'салат', 'пирог', 'рагу', 'омлет', 'плов', 'пюре', 'соус')
+STYLES = (
+    'по-домашнему',
+    'с травами',
+    'на скорую руку',
+    'по-итальянски',
+    'с сыром',
+    'по рецепту бабушки',
+)
+STEPS = (
+    'Подготовьте и нарежьте ингредиенты.',
+    'Разогрейте сковороду с маслом.',
+    'Доведите до кипения и убавьте огонь.',
+    'Посолите и поперчите по вкусу.',
+    'Перемешайте и дайте настояться.',
+    'Запекайте до золотистой корочки.',
+    'Подавайте горячим.',
+)
+UNITS = ('г', 'мл', 'шт.', 'ст. л.', 'ч. л.')
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def zipf_weights(
+    rng: random.Random,
+    count: int,
+    exponent: float,
+) -> list[float]:
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(rank**-exponent for rank in ranks))
+
+
+def sample(
+    rng: random.Random,
+    population: Sequence[Hashable],
+    cum_weights: list[float],
+    count: int,
+    exclude: Optional[Hashable] = None,
+) -> list:
+    count = min(count, len(population) - (exclude is not None))
+    chosen: dict[Hashable, None] = {}
+    while len(chosen) < count:
+        for item in rng.choices(
+            population,
+            cum_weights=cum_weights,
+            k=count - len(chosen),
+        ):
+            if item != exclude:
+                chosen[item] = None
+    return list(chosen)
+
+
+def draw_count(rng: random.Random, mean: float) -> int:
+    if mean <= 0:
+        return 0
+    return int(rng.expovariate(1 / mean))
+
+
+def copy_rows(model: type[Model], fields: Sequence[str], rows: list) -> None:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    quote = connection.ops.quote_name
+    concrete_fields = {
+        field.attname: field for field in model._meta.concrete_fields
+    }
+    model_fields = [concrete_fields[field] for field in fields]
+    columns = ', '.join(quote(field.column) for field in model_fields)
+    sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN'
+    json_fields = [
+        position
+        for position, field in enumerate(model_fields)
+        if isinstance(field, JSONField)
+    ]
+    if json_fields:
+        rows = [
+            tuple(
+                json.dumps(value) if position in json_fields else value
+                for position, value in enumerate(row)
+            )
+            for row in rows
+        ]
+    with connection.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(f'{sql} WITH (FORMAT csv)', buffer)
+
+
+def create_rows(model: type[Model], fields: Sequence[str], rows: list) -> None:
+    objects = [model(**dict(zip(fields, row))) for row in rows]
+    model.objects.bulk_create(objects)
+    auto_fields = [
+        field
+        for field in fields
+        if getattr(model._meta.get_field(field), 'auto_now', False)
+        or getattr(model._meta.get_field(field), 'auto_now_add', False)
+    ]
+    if auto_fields:
+        for obj, row in zip(objects, rows):
+            for field, value in zip(fields, row):
+                setattr(obj, field, value)
+        model.objects.bulk_update(objects, auto_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate users, recipes, subscriptions, favorites and shopping '
+        'carts with skewed popularity.'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        del args
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.use_copy = connection.vendor == 'postgresql' and not options.get(
+            'no_copy'
+        )
+        started = time.monotonic()
+        ingredient_ids = self.generate_ingredients()
+        tag_ids = self.generate_tags()
+        user_ids = self.generate_users()
+        popularity = zipf_weights(
+            self.rng,
+            len(user_ids),
+            options['follower_exponent'],
+        )
+        recipe_ids = self.generate_recipes(user_ids, popularity)
+        self.generate_links(ingredient_ids, tag_ids, recipe_ids)
+        self.generate_subscriptions(user_ids, popularity)
+        self.generate_lists(user_ids, recipe_ids)
+        models.Recipe.objects.reconcile_counters()
+        versioned: tuple[type[Model], ...] = (
+            models.Ingredient,
+            models.Tag,
+            models.User,
+        )
+        for model in versioned:
+            bump_version(model)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done in {time.monotonic() - started:.2f}s.',
+            )
+        )
+
+    def insert(
+        self,
+        model: type[Model],
+        fields: Sequence[str],
+        rows: Iterable[tuple],
+        return_ids: bool = False,
+    ) -> list[int]:
+        started = time.monotonic()
+        if return_ids:
+            last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        write = copy_rows if self.use_copy else create_rows
+        inserted = 0
+        for batch in batched(rows, self.options['batch_size']):
+            with transaction.atomic():
+                write(model, fields, batch)
+            inserted += len(batch)
+        self.stdout.write(
+            f'{model._meta.label}: {inserted} rows in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
+        if not return_ids:
+            return []
+        return list(
+            model.objects.filter(pk__gt=last)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def generate_ingredients(self) -> list[int]:
+        prefix = self.options['prefix']
+        missing = (
+            self.options['ingredients'] - models.Ingredient.objects.count()
+        )
+        models.Ingredient.objects.bulk_create(
+            (
+                models.Ingredient(
+                    name=f'{prefix} ингредиент {number}',
+                    measurement_unit=UNITS[number % len(UNITS)],
+                )
+                for number in range(max(missing, 0))
+            ),
+            batch_size=self.options['batch_size'],
+            ignore_conflicts=True,
+        )
+        return list(
+            models.Ingredient.objects.order_by('pk').values_list(
+                'pk',
+                flat=True,
+            )
+        )
+
+    def generate_tags(self) -> list[int]:
+        prefix = self.options['prefix']
+        slugs = [
+            f'{prefix}-tag-{number}' for number in range(self.options['tags'])
+        ]
+        models.Tag.objects.bulk_create(
+            (
+                models.Tag(
+                    name=f'{prefix} метка {number}',
+                    color=f'#{self.rng.randrange(0x1000000):06X}',
+                    slug=slug,
+                )
+                for number, slug in enumerate(slugs)
+            ),
+            ignore_conflicts=True,
+        )
+        return list(
+            models.Tag.objects.filter(slug__in=slugs)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def generate_users(self) -> list[int]:
+        prefix = self.options['prefix']
+        start = models.User.objects.filter(
+            username__startswith=prefix,
+        ).count()
+        password = make_password(None)
+        return self.insert(
+            models.User,
+            (
+                'username',
+                'email',
+                'first_name',
+                'last_name',
+                'password',
+                'is_active',
+                'is_staff',
+                'is_superuser',
+                'date_joined',
+            ),
+            (
+                (
+                    f'{prefix}{number}',
+                    f'{prefix}{number}@example.com',
+                    self.rng.choice(FIRST_NAMES),
+                    self.rng.choice(LAST_NAMES),
+                    password,
+                    True,
+                    False,
+                    False,
+                    timezone.now(),
+                )
+                for number in range(start, start + self.options['users'])
+            ),
+            return_ids=True,
+        )
+
+    def generate_recipes(
+        self,
+        user_ids: list[int],
+        popularity: list[float],
+    ) -> list[int]:
+        count = self.options['recipes']
+        if not user_ids or not count:
+            return []
+        now = timezone.now()
+        step = timedelta(days=self.options['days']) / count
+        image = self.options['image']
+
+        def rows() -> Iterator[tuple]:
+            for batch in batched(range(count), self.options['batch_size']):
+                authors = self.rng.choices(
+                    user_ids,
+                    cum_weights=popularity,
+                    k=len(batch),
+                )
+                for number, author_id in zip(batch, authors):
+                    pub_date = now - step * (count - number)
+                    yield (
+                        author_id,
+                        f'{self.rng.choice(DISHES).capitalize()} '
+                        f'{self.rng.choice(STYLES)}',
+                        ' '.join(
+                            self.rng.sample(STEPS, self.rng.randint(2, 5))
+                        ),
+                        self.rng.randint(1, 180),
+                        image,
+                        {},
+                        pub_date,
+                        pub_date,
+                        0,
+                        0,
+                    )
+
+        return self.insert(
+            models.Recipe,
+            (
+                'author_id',
+                'name',
+                'text',
+                'cooking_time',
+                'image',
+                'image_variants',
+                'pub_date',
+                'updated_at',
+                'favorites_count',
+                'carts_count',
+            ),
+            rows(),
+            return_ids=True,
+        )
+
+    def generate_links(
+        self,
+        ingredient_ids: list[int],
+        tag_ids: list[int],
+        recipe_ids: list[int],
+    ) -> None:
+        mean = self.options['ingredients_per_recipe']
+        ingredient_weights = zipf_weights(
+            self.rng,
+            len(ingredient_ids),
+            self.options['ingredient_exponent'],
+        )
+        tag_weights = zipf_weights(self.rng, len(tag_ids), 1.0)
+        if ingredient_ids:
+            self.insert(
+                models.IngredientInRecipe,
+                ('recipe_id', 'ingredient_id', 'amount'),
+                (
+                    (recipe_id, ingredient_id, self.rng.randint(1, 500))
+                    for recipe_id in recipe_ids
+                    for ingredient_id in sample(
+                        self.rng,
+                        ingredient_ids,
+                        ingredient_weights,
+                        max(1, round(self.rng.gauss(mean, mean / 3))),
+                    )
+                ),
+            )
+        if tag_ids:
+            self.insert(
+                models.Recipe.tags.through,
+                ('recipe_id', 'tag_id'),
+                (
+                    (recipe_id, tag_id)
+                    for recipe_id in recipe_ids
+                    for tag_id in sample(
+                        self.rng,
+                        tag_ids,
+                        tag_weights,
+                        self.rng.randint(1, 3),
+                    )
+                ),
+            )
+
+    def generate_subscriptions(
+        self,
+        user_ids: list[int],
+        popularity: list[float],
+    ) -> None:
+        mean = self.options['subscriptions_per_user']
+        self.insert(
+            models.Subscribe,
+            ('user_id', 'author_id'),
+            (
+                (user_id, author_id)
+                for user_id in user_ids
+                for author_id in sample(
+                    self.rng,
+                    user_ids,
+                    popularity,
+                    draw_count(self.rng, mean),
+                    exclude=user_id,
+                )
+            ),
+        )
+
+    def generate_lists(
+        self,
+        user_ids: list[int],
+        recipe_ids: list[int],
+    ) -> None:
+        if not recipe_ids:
+            return
+        weights = zipf_weights(
+            self.rng,
+            len(recipe_ids),
+            self.options['recipe_exponent'],
+        )
+        for model, option in (
+            (models.Favorite, 'favorites_per_user'),
+            (models.Cart, 'carts_per_user'),
+        ):
+            self.insert(
+                model,
+                ('author_id', 'recipe_id'),
+                (
+                    (user_id, recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in sample(
+                        self.rng,
+                        recipe_ids,
+                        weights,
+                        draw_count(self.rng, self.options[option]),
+                    )
+                ),
+            )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for name, default, help_text in (
+            ('users', 1000, 'Number of users to create.'),
+            ('recipes', 10000, 'Number of recipes to create.'),
+            ('tags', 8, 'Number of tags to create.'),
+            (
+                'ingredients',
+                1000,
+                'Add synthetic ingredients until there are this many.',
+            ),
+            (
+                'ingredients-per-recipe',
+                8,
+                'Mean number of ingredients in a recipe.',
+            ),
+            (
+                'subscriptions-per-user',
+                10,
+                'Mean number of authors a user follows.',
+            ),
+            (
+                'favorites-per-user',
+                20,
+                'Mean number of favorite recipes per user.',
+            ),
+            (
+                'carts-per-user',
+                5,
+                'Mean number of recipes in a shopping cart.',
+            ),
+            ('days', 365, 'Spread publication dates over this many days.'),
+            ('batch-size', 10000, 'Number of rows inserted per statement.'),
+            ('seed', 0, 'Random seed, the same seed gives the same data.'),
+        ):
+            parser.add_argument(
+                f'--{name}',
+                action='store',
+                default=default,
+                help=help_text,
+                type=int,
+            )
+        for name, exponent, help_text in (
+            (
+                'follower-exponent',
+                1.2,
+                'Power-law exponent of followers and recipes per author.',
+            ),
+            (
+                'ingredient-exponent',
+                1.0,
+                'Zipf exponent of ingredient popularity.',
+            ),
+            (
+                'recipe-exponent',
+                1.0,
+                'Zipf exponent of recipe popularity in favorites and carts.',
+            ),
+        ):
+            parser.add_argument(
+                f'--{name}',
+                action='store',
+                default=exponent,
+                help=help_text,
+                type=float,
+            )
+        parser.add_argument(
+            '--prefix',
+            action='store',
+            default='user',
+            help='Prefix of generated usernames, tag slugs and ingredients.',
+            type=str,
+        )
+        parser.add_argument(
+            '--image',
+            action='store',
+            default=None,
+            help='Storage path of the image every recipe refers to.',
+            type=str,
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Insert with bulk_create instead of PostgreSQL COPY.',
+        )
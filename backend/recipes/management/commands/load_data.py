@@ -1,27 +1,84 @@
 import csv
 import json
+import time
+from itertools import islice
+from typing import IO, Iterable, Iterator
 
 from django.core.management.base import BaseCommand, CommandParser
 
 from recipes import models
+from recipes.cache import bump_version
+
+FIELDNAMES = ('name', 'measurement_unit')
+READ_SIZE = 64 * 1024
+
+
+def iter_json_array(file: IO[str]) -> Iterator[dict]:
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('JSON file must contain an array of objects.')
+    position = 1
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def iter_unique(rows: Iterable[dict]) -> Iterator[models.Ingredient]:
+    seen = set()
+    for row in rows:
+        key = tuple(row[field] for field in FIELDNAMES)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield models.Ingredient(**dict(zip(FIELDNAMES, key)))
 
 
 class Command(BaseCommand):
     def handle(self, *args: tuple, **options: dict[str, str]) -> None:
         del args
+        batch_size = int(options.get('batch_size', 1000))  # type: ignore
+        started = time.monotonic()
+        count_before = models.Ingredient.objects.count()
+        read = 0
         with open(
             options.get('file', ''),  # type: ignore
             encoding='utf-8',
         ) as file:
+            contents: Iterable[dict]
             if not options.get('json'):
-                contents = csv.DictReader(
-                    file,
-                    fieldnames=('name', 'measurement_unit'),
-                )
+                contents = csv.DictReader(file, fieldnames=FIELDNAMES)
             else:
-                contents = json.load(file)
-            for row in contents:
-                models.Ingredient.objects.get_or_create(**row)  # type: ignore
+                contents = iter_json_array(file)
+            ingredients = iter_unique(contents)
+            while batch := list(islice(ingredients, batch_size)):
+                models.Ingredient.objects.bulk_create(
+                    batch,
+                    ignore_conflicts=True,
+                )
+                read += len(batch)
+                self.stdout.write(f'Processed {read} unique rows.')
+        inserted = models.Ingredient.objects.count() - count_before
+        if inserted:
+            bump_version(models.Ingredient)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done: {inserted} of {read} unique rows inserted in '
+                f'{time.monotonic() - started:.2f}s.'
+            )
+        )
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument(
@@ -37,3 +94,10 @@ class Command(BaseCommand):
             action='store_true',
             help='JSON file format.',
         )
+        parser.add_argument(
+            '--batch-size',
+            action='store',
+            default=1000,
+            help='Number of rows inserted per query.',
+            type=int,
+        )
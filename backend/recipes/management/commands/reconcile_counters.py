@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recipes import models
+
+
+class Command(BaseCommand):
+    help = 'Recount favorites and shopping carts of every recipe.'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        del args, options
+        updated = models.Recipe.objects.reconcile_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f'Done: {updated} recipe counters fixed.')
+        )
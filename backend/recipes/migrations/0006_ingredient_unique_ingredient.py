@@ -0,0 +1,59 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+MAX_AMOUNT = 32767
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    duplicates = (
+        Ingredient.objects.order_by()
+        .values('name', 'measurement_unit')
+        .annotate(kept=models.Min('pk'), count=models.Count('pk'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        kept = duplicate['kept']
+        merged = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(pk=kept)
+        rows = IngredientInRecipe.objects.filter(
+            ingredient__in=merged,
+        ).order_by('pk')
+        for row in rows:
+            target = IngredientInRecipe.objects.filter(
+                ingredient_id=kept,
+                recipe_id=row.recipe_id,
+            ).first()
+            if target is None:
+                row.ingredient_id = kept
+                row.save(update_fields=('ingredient',))
+                continue
+            target.amount = min(target.amount + row.amount, MAX_AMOUNT)
+            target.save(update_fields=('amount',))
+            row.delete()
+        merged.delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0005_remove_recipe_favorite_count_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(
+                fields=('name', 'measurement_unit'), name='unique_ingredient'
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.2 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    counters = {
+        field: models.Subquery(
+            apps.get_model('recipes', model_name)
+            .objects.filter(recipe=models.OuterRef('pk'))
+            .order_by()
+            .annotate(value=models.Func(models.F('pk'), function='COUNT'))
+            .values('value')
+        )
+        for field, model_name in (
+            ('favorites_count', 'Favorite'),
+            ('carts_count', 'Cart'),
+        )
+    }
+    Recipe.objects.update(**counters)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0009_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='в списках покупок'
+            ),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='в избранном'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['-favorites_count', '-pub_date', '-id'],
+                name='recipe_favorites_count_idx',
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,20 @@
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional, Union
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.db.models.functions import Now, Upper
 
 User = get_user_model()
 
+DERIVED_FIELDS = ('favorites_count', 'carts_count', 'image_variants')
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -18,6 +28,18 @@ class Ingredient(models.Model):
 
     class Meta:
         default_related_name = '%(class)s'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_%(class)s',
+            ),
+        ]
+        indexes = [
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='recipes_ingredient_name_trgm',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -50,6 +72,84 @@ class Tag(models.Model):
         return f'Метка {self.name}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(
+        self,
+        user: Union[AbstractBaseUser, AnonymousUser],
+    ) -> 'RecipeQuerySet':
+        return self.prefetch_related(
+            models.Prefetch(
+                'author',
+                queryset=User.objects.annotate(
+                    is_subscribed=models.Exists(
+                        Subscribe.objects.filter(
+                            author=models.OuterRef('pk'),
+                            user=user.pk,
+                        )
+                    )
+                ),
+            ),
+            models.Prefetch(
+                'ingredientinrecipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+            'tags',
+        ).annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(
+                    author=user.pk,
+                    recipe=models.OuterRef('pk'),
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                Cart.objects.filter(
+                    author=user.pk,
+                    recipe=models.OuterRef('pk'),
+                )
+            ),
+        )
+
+    def shift_counter(self, field: str, delta: int) -> int:
+        queryset = self
+        if delta < 0:
+            queryset = queryset.filter(**{f'{field}__gte': -delta})
+        return queryset.update(
+            **{field: models.F(field) + delta},
+            updated_at=Now(),
+        )
+
+    def reconcile_counters(self) -> int:
+        actual = {
+            field: models.Subquery(
+                model.objects.filter(recipe=models.OuterRef('pk'))
+                .order_by()
+                .annotate(value=models.Func(models.F('pk'), function='COUNT'))
+                .values('value')
+            )
+            for field, model in (
+                ('favorites_count', Favorite),
+                ('carts_count', Cart),
+            )
+        }
+        stale = self.alias(
+            **{f'actual_{field}': value for field, value in actual.items()}
+        ).filter(
+            reduce(
+                or_,
+                (
+                    ~models.Q(**{field: models.F(f'actual_{field}')})
+                    for field in actual
+                ),
+            )
+        )
+        return self.filter(pk__in=stale.values('pk')).update(
+            **actual,
+            updated_at=Now(),
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -66,6 +166,12 @@ class Recipe(models.Model):
         null=True,
         default=None,
     )
+    image_variants = models.JSONField(
+        verbose_name='варианты фото',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         through='IngredientInRecipe',
@@ -80,16 +186,57 @@ class Recipe(models.Model):
         verbose_name='дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+    )
     tags = models.ManyToManyField(Tag, verbose_name='список меток')
     text = models.TextField(verbose_name='описание рецепта')
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='в избранном',
+        default=0,
+        editable=False,
+    )
+    carts_count = models.PositiveIntegerField(
+        verbose_name='в списках покупок',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         default_related_name = '%(class)s'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_favorites_count_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return f'{self.name} пользователя {self.author}'
 
+    def save(
+        self,
+        force_insert: bool = False,
+        force_update: bool = False,
+        using: Optional[str] = None,
+        update_fields: Optional[Iterable[str]] = None,
+    ) -> None:
+        if not self._state.adding and update_fields is None:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in DERIVED_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
 
 class IngredientInRecipe(models.Model):
     amount = models.PositiveSmallIntegerField(
@@ -127,6 +274,7 @@ class CartFavList(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='владелец списка',
     )
     recipe = models.ForeignKey(
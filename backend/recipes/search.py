@@ -0,0 +1,132 @@
+import logging
+import sys
+import threading
+from bisect import bisect_left
+from itertools import chain
+from typing import Iterable, Optional
+
+from django.db import DatabaseError
+
+from recipes.cache import get_version
+from recipes.models import Ingredient
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('id', 'name', 'measurement_unit')
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(
+        self,
+        ingredients: Iterable[tuple[int, str, str]],
+        version: int = 0,
+    ) -> None:
+        self.version = version
+        units: dict[str, str] = {}
+        self.items = [
+            (pk, name, units.setdefault(unit, unit))
+            for pk, name, unit in sorted(ingredients)
+        ]
+        names, words = [], []
+        for position, (_, original, _) in enumerate(self.items):
+            name = normalize(original)
+            if name == original:
+                name = original
+            names.append((name, position))
+            words.extend(
+                (name[start:], position)
+                for start in range(1, len(name))
+                if name[start - 1] == ' ' and name[start] != ' '
+            )
+        names.sort()
+        words.sort()
+        self.name_keys = [key for key, _ in names]
+        self.name_positions = [position for _, position in names]
+        self.word_keys = [key for key, _ in words]
+        self.word_positions = [position for _, position in words]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def all(self) -> list[dict]:
+        return [dict(zip(FIELDS, item)) for item in self.items]
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        query = normalize(query)
+        found: dict[int, None] = {}
+        for keys, positions in (
+            (self.name_keys, self.name_positions),
+            (self.word_keys, self.word_positions),
+        ):
+            index = bisect_left(keys, query)
+            while (
+                len(found) < limit
+                and index < len(keys)
+                and keys[index].startswith(query)
+            ):
+                found.setdefault(positions[index])
+                index += 1
+        return [dict(zip(FIELDS, self.items[position])) for position in found]
+
+    def memory_usage(self) -> int:
+        containers = (
+            self.items,
+            self.name_keys,
+            self.name_positions,
+            self.word_keys,
+            self.word_positions,
+        )
+        seen = set()
+        size = 0
+        for value in chain(
+            containers,
+            chain.from_iterable(containers),
+            chain.from_iterable(self.items),
+        ):
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+        return size
+
+    @classmethod
+    def from_database(cls, version: int = 0) -> 'IngredientIndex':
+        return cls(
+            Ingredient.objects.values_list(
+                'id',
+                'name',
+                'measurement_unit',
+            ).iterator(),
+            version,
+        )
+
+
+_index: Optional[IngredientIndex] = None
+_lock = threading.Lock()
+
+
+def get_ingredient_index() -> IngredientIndex:
+    global _index
+    version = get_version(Ingredient)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = IngredientIndex.from_database(version)
+            logger.info(
+                'Ingredient index built: %d items, version %s.',
+                len(_index),
+                version,
+            )
+        return _index
+
+
+def warm_ingredient_index() -> None:
+    try:
+        get_ingredient_index()
+    except DatabaseError:
+        logger.exception('Ingredient index warm up failed.')
@@ -0,0 +1,35 @@
+from functools import partial
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.cache import bump_version
+from recipes.images import schedule_recipe_image
+from recipes.models import Ingredient, Recipe, Tag, User
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reference_data_changed(sender: type[Model], **kwargs: Any) -> None:
+    bump_version(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender: type[Model], **kwargs: Any) -> None:
+    if set(kwargs.get('update_fields') or ()) == {'last_login'}:
+        return
+    bump_version(sender)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender: type[Model], instance: Recipe, **kwargs: Any) -> None:
+    if instance.image and (
+        instance.image_variants.get('source') != instance.image.name
+    ):
+        transaction.on_commit(partial(schedule_recipe_image, instance.pk))
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import posixpath
+from typing import IO, Iterator, Optional
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name: str, content: File) -> str:
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        _, ext = posixpath.splitext(filename)
+        hexdigest = digest.hexdigest()
+        return posixpath.join(
+            directory,
+            hexdigest[:2],
+            f'{hexdigest}{ext.lower()}',
+        )
+
+    def save(
+        self,
+        name: Optional[str],
+        content: IO,
+        max_length: Optional[int] = None,
+    ) -> str:
+        if name is None:
+            name = content.name
+        file = content if isinstance(content, File) else File(content, name)
+        name = self.get_content_name(name, file)
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, file, max_length)
+        return name
+
+
+def walk(storage: Storage, path: str) -> Iterator[str]:
+    directories, files = storage.listdir(path)
+    for file in files:
+        yield posixpath.join(path, file)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
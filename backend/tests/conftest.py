@@ -0,0 +1,28 @@
+import pytest
+from django.core.cache import cache
+
+pytest_plugins = ('tests.query_budget',)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path) -> None:
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture(autouse=True)
+def image_workers(settings) -> None:
+    settings.IMAGE_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def cache_backend(settings) -> None:
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_backend) -> None:
+    cache.clear()
@@ -0,0 +1,114 @@
+import re
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Callable, Iterator, Optional, TypeVar, cast
+
+import pytest
+from django.core.handlers.wsgi import get_path_info, get_str_from_wsgi
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+MARKER = 'query_budget'
+PLACEHOLDERS = re.compile(r'%s(?:, %s)+')
+
+budget_key = pytest.StashKey['QueryBudget']()
+
+Hook = TypeVar('Hook', bound=Callable[..., Any])
+
+
+def hookwrapper(function: Hook) -> Hook:
+    return cast(Hook, pytest.hookimpl(function, hookwrapper=True))
+
+
+def normalize(sql: str) -> str:
+    return PLACEHOLDERS.sub('%s, ...', sql)
+
+
+class QueryBudget:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.request = ''
+        self.queries: Optional[list[str]] = None
+        self.violations: list[tuple[str, list[str]]] = []
+
+    def start(self, environ: Optional[dict] = None, **kwargs: Any) -> None:
+        environ = environ or {}
+        query = get_str_from_wsgi(environ, 'QUERY_STRING', '')
+        self.request = ' '.join(
+            (
+                environ.get('REQUEST_METHOD', ''),
+                get_path_info(environ) + (f'?{query}' if query else ''),
+            )
+        )
+        self.queries = []
+
+    def finish(self, **kwargs: Any) -> None:
+        if self.queries is not None and len(self.queries) > self.limit:
+            self.violations.append((self.request, self.queries))
+        self.queries = None
+
+    def record(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict,
+    ) -> Any:
+        if self.queries is not None:
+            self.queries.append(normalize(sql))
+        return execute(sql, params, many, context)
+
+    def report(self) -> str:
+        lines = []
+        for request, queries in self.violations:
+            lines.append(
+                f'{request}: {len(queries)} queries, '
+                f'the budget is {self.limit}.'
+            )
+            duplicates = [
+                (count, sql)
+                for sql, count in Counter(queries).most_common()
+                if count > 1
+            ]
+            if duplicates:
+                lines.append('Duplicated SQL:')
+                lines.extend(f'  {count} x {sql}' for count, sql in duplicates)
+        return '\n'.join(lines)
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        'markers',
+        f'{MARKER}(limit): fail when a request runs more than limit queries.',
+    )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(
+    request: pytest.FixtureRequest,
+) -> Iterator[Optional[QueryBudget]]:
+    marker = request.node.get_closest_marker(MARKER)
+    if marker is None:
+        yield None
+        return
+    budget = QueryBudget(*marker.args, **marker.kwargs)
+    request.node.stash[budget_key] = budget
+    request_started.connect(budget.start)
+    request_finished.connect(budget.finish)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(budget.record))
+            yield budget
+    finally:
+        request_started.disconnect(budget.start)
+        request_finished.disconnect(budget.finish)
+
+
+@hookwrapper
+def pytest_runtest_call(item: pytest.Item) -> Iterator[None]:
+    outcome = yield
+    budget = item.stash.get(budget_key, None)
+    if outcome.excinfo is None and budget is not None and budget.violations:
+        raise AssertionError(budget.report())
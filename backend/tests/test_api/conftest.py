@@ -4,6 +4,7 @@ import pytest
 from factory.django import DjangoModelFactory
 from rest_framework.test import APIClient
 from tests.test_api.factories import (
+    IngredientInRecipeFactory,
     RecipeFactory,
     RecipeWithIngredient,
     TagFactory,
@@ -48,3 +49,17 @@ def fill_recipe_with_tags_batch(fill_tag_batch) -> Callable:
         )
 
     return wrap
+
+
+@pytest.fixture()
+def fill_recipe_full_batch(fill_tag_batch) -> Callable:
+    def wrap(recipe_quantity: int = 5) -> DjangoModelFactory:
+        recipes = RecipeFactory.create_batch(
+            recipe_quantity,
+            tags=fill_tag_batch(2),
+        )
+        for recipe in recipes:
+            IngredientInRecipeFactory.create_batch(2, recipe=recipe)
+        return recipes
+
+    return wrap
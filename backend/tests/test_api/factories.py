@@ -1,9 +1,17 @@
-from factory import RelatedFactory, SubFactory, post_generation
-from factory.django import DjangoModelFactory
+from factory import RelatedFactory, Sequence, SubFactory, post_generation
+from factory.django import DjangoModelFactory, ImageField
 from factory.faker import Faker
-from tests.utils import generate_base64_image_string
 
-from recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag, User
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    Subscribe,
+    Tag,
+    User,
+)
 
 
 class UserFactory(DjangoModelFactory):
@@ -26,7 +34,7 @@ class IngredientFactory(DjangoModelFactory):
 
 
 class TagFactory(DjangoModelFactory):
-    name = Faker('word', locale='ru')
+    name = Sequence(lambda number: f'метка {number}')
     color = Faker('color')
     slug = Faker('slug')
 
@@ -38,12 +46,10 @@ class TagFactory(DjangoModelFactory):
 class RecipeFactory(DjangoModelFactory):
     author = SubFactory(UserFactory)
     cooking_time = Faker('random_int')
-    image = generate_base64_image_string()
+    image = ImageField()
     name = Faker('sentence', locale='ru')
     pub_date = Faker('date_time')
     text = Faker('text', locale='ru')
-    favorite_count = Faker('random_int')
-    in_shopping_cart_count = Faker('random_int')
 
     @post_generation  # type: ignore
     def tags(self, create: bool, extracted: list, **kwargs) -> None:
@@ -71,3 +77,27 @@ class RecipeWithIngredient(IngredientFactory):
         IngredientInRecipeFactory,
         factory_related_name='ingredient',
     )
+
+
+class SubscribeFactory(DjangoModelFactory):
+    author = SubFactory(UserFactory)
+    user = SubFactory(UserFactory)
+
+    class Meta:
+        model = Subscribe
+
+
+class CartFactory(DjangoModelFactory):
+    author = SubFactory(UserFactory)
+    recipe = SubFactory(RecipeFactory)
+
+    class Meta:
+        model = Cart
+
+
+class FavoriteFactory(DjangoModelFactory):
+    author = SubFactory(UserFactory)
+    recipe = SubFactory(RecipeFactory)
+
+    class Meta:
+        model = Favorite
@@ -0,0 +1,108 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+from tests.test_api.factories import CartFactory, RecipeFactory, UserFactory
+
+from recipes.models import Cart, Favorite, Recipe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    'endpoint, model, field',
+    (
+        ('/api/recipes/favorite/', Favorite, 'favorites_count'),
+        ('/api/recipes/shopping_cart/', Cart, 'carts_count'),
+    ),
+)
+class TestBatch:
+    @pytest.fixture()
+    def user(self, api_client: APIClient):
+        user = UserFactory.create()
+        api_client.force_authenticate(user)
+        return user
+
+    def test_create_batch(
+        self,
+        api_client: APIClient,
+        user,
+        endpoint: str,
+        model: type,
+        field: str,
+        django_assert_max_num_queries,
+    ) -> None:
+        first, second, third = RecipeFactory.create_batch(3)
+        model.objects.create(author=user, recipe=first)
+        missing = third.pk + 1
+        with django_assert_max_num_queries(8):
+            response = api_client.post(
+                endpoint,
+                {'recipes': [first.pk, second.pk, third.pk, missing]},
+                format='json',
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content) == [
+            {'id': first.pk, 'status': 'exists'},
+            {'id': second.pk, 'status': 'created'},
+            {'id': third.pk, 'status': 'created'},
+            {'id': missing, 'status': 'not_found'},
+        ]
+        assert model.objects.filter(author=user).count() == 3
+        assert dict(Recipe.objects.values_list('pk', field)) == {
+            first.pk: 1,
+            second.pk: 1,
+            third.pk: 1,
+        }
+
+    def test_destroy_batch(
+        self,
+        api_client: APIClient,
+        user,
+        endpoint: str,
+        model: type,
+        field: str,
+    ) -> None:
+        first, second = RecipeFactory.create_batch(2)
+        api_client.post(endpoint, {'recipes': [first.pk]}, format='json')
+        other = model.objects.create(author=UserFactory.create(), recipe=first)
+        response = api_client.delete(
+            endpoint,
+            {'recipes': [first.pk, second.pk]},
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content) == [
+            {'id': first.pk, 'status': 'deleted'},
+            {'id': second.pk, 'status': 'absent'},
+        ]
+        assert list(model.objects.all()) == [other]
+        first.refresh_from_db()
+        assert getattr(first, field) == 1
+
+    @pytest.mark.parametrize(
+        'payload', ({}, {'recipes': []}, {'recipes': 'x'})
+    )
+    def test_invalid_payload(
+        self,
+        api_client: APIClient,
+        user,
+        endpoint: str,
+        model: type,
+        field: str,
+        payload: dict,
+    ) -> None:
+        response = api_client.post(endpoint, payload, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_anonymous(
+        self,
+        api_client: APIClient,
+        endpoint: str,
+        model: type,
+        field: str,
+    ) -> None:
+        CartFactory.create()
+        response = api_client.post(endpoint, {'recipes': [1]}, format='json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,109 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+from tests.test_api.factories import IngredientFactory
+
+from api.filters import has_trigram_extension
+from recipes.search import IngredientIndex
+
+pytestmark = pytest.mark.django_db
+
+ENDPOINT = '/api/ingredients/'
+
+
+class TestIngredientSearch:
+    @pytest.fixture(autouse=True)
+    def ingredients(self) -> None:
+        for name in (
+            'сливочное масло',
+            'масло оливковое',
+            'мука',
+            'маслины',
+            'сахар',
+        ):
+            IngredientFactory.create(name=name, measurement_unit='г')
+
+    def search(self, api_client: APIClient, name: str) -> list[str]:
+        response = api_client.get(ENDPOINT, {'name': name})
+        assert response.status_code == HTTPStatus.OK
+        return [item['name'] for item in json.loads(response.content)]
+
+    def test_list_without_search(self, api_client: APIClient) -> None:
+        response = api_client.get(ENDPOINT)
+        assert len(json.loads(response.content)) == 5
+
+    def test_prefix_matches_go_first(self, api_client: APIClient) -> None:
+        if connection.vendor != 'postgresql':
+            pytest.skip('SQLite LIKE only folds ASCII case.')
+        assert self.search(api_client, 'Масл') == [
+            'маслины',
+            'масло оливковое',
+            'сливочное масло',
+        ]
+
+    def test_results_are_limited(
+        self,
+        api_client: APIClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(
+            'api.filters.IngredientSearchFilter.max_results',
+            2,
+        )
+        assert len(self.search(api_client, 'масл')) == 2
+
+    def test_typo_tolerant_match(self, api_client: APIClient) -> None:
+        if not has_trigram_extension(connection.alias):
+            pytest.skip('pg_trgm extension is not installed.')
+        assert self.search(api_client, 'сохар') == ['сахар']
+
+
+class TestIngredientIndex:
+    @pytest.fixture(autouse=True)
+    def index_enabled(self, settings, monkeypatch: pytest.MonkeyPatch):
+        settings.INGREDIENT_SEARCH_INDEX = True
+        monkeypatch.setattr('recipes.search._index', None)
+        cache.clear()
+        for name in ('сливочное масло', 'Масло оливковое', 'ёрш', 'мука'):
+            IngredientFactory.create(name=name, measurement_unit='г')
+
+    def search(self, api_client: APIClient, name: str) -> list[str]:
+        response = api_client.get(ENDPOINT, {'name': name})
+        assert response.status_code == HTTPStatus.OK
+        return [item['name'] for item in json.loads(response.content)]
+
+    def test_prefix_matches_go_first(self, api_client: APIClient) -> None:
+        assert self.search(api_client, 'масл') == [
+            'Масло оливковое',
+            'сливочное масло',
+        ]
+
+    def test_yo_is_normalized(self, api_client: APIClient) -> None:
+        assert self.search(api_client, 'ерш') == ['ёрш']
+
+    def test_list_served_without_queries(
+        self,
+        api_client: APIClient,
+        django_assert_num_queries,
+    ) -> None:
+        api_client.get(ENDPOINT)
+        with django_assert_num_queries(0):
+            response = api_client.get(ENDPOINT)
+        assert len(json.loads(response.content)) == 4
+        with django_assert_num_queries(0):
+            assert self.search(api_client, 'мук') == ['мука']
+
+    def test_index_reloaded_after_save(self, api_client: APIClient) -> None:
+        assert self.search(api_client, 'мук') == ['мука']
+        IngredientFactory.create(name='мускат', measurement_unit='г')
+        assert self.search(api_client, 'му') == ['мука', 'мускат']
+
+    def test_search_limit(self) -> None:
+        index = IngredientIndex(
+            (number, f'мука {number}', 'г') for number in range(10)
+        )
+        assert len(index.search('мука', 3)) == 3
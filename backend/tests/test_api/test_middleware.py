@@ -0,0 +1,70 @@
+import json
+import logging
+from http import HTTPStatus
+from typing import Callable
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+ENDPOINT = '/api/recipes/'
+MIDDLEWARE = 'api.middleware.RequestMetricsMiddleware'
+
+
+@pytest.fixture(autouse=True)
+def request_metrics(settings) -> None:
+    settings.MIDDLEWARE = [MIDDLEWARE, *settings.MIDDLEWARE]
+
+
+class TestRequestMetrics:
+    def test_server_timing(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+    ) -> None:
+        fill_recipe_full_batch(3)
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(ENDPOINT)
+        assert response.status_code == HTTPStatus.OK
+        timings = dict(
+            entry.split(';', 1)
+            for entry in response['Server-Timing'].split(', ')
+        )
+        assert set(timings) == {'db', 'view', 'serializer', 'render', 'total'}
+        assert f'desc="{len(context)} queries"' in timings['db']
+        assert (
+            float(timings['serializer'].removeprefix('dur=')) > 0
+        ), 'Время сериализации не измерено.'
+
+    def test_structured_log(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        caplog,
+    ) -> None:
+        recipe = fill_recipe_full_batch(1)[0]
+        with caplog.at_level(logging.INFO, logger='api.middleware'):
+            response = api_client.get(f'{ENDPOINT}{recipe.pk}/')
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['view'] == 'RecipeViewSet.retrieve'
+        assert record['status'] == HTTPStatus.OK
+        assert record['size'] == len(response.content)
+        assert record['queries'] > 0
+        assert caplog.records[-1].levelno == logging.INFO
+
+    def test_query_budget_exceeded(
+        self,
+        settings,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        caplog,
+    ) -> None:
+        settings.REQUEST_QUERY_BUDGET = 1
+        fill_recipe_full_batch(3)
+        with caplog.at_level(logging.INFO, logger='api.middleware'):
+            api_client.get(ENDPOINT)
+        assert caplog.records[-1].levelno == logging.WARNING
+        assert caplog.records[-1].metrics['query_budget'] == 1
@@ -0,0 +1,391 @@
+from http import HTTPStatus
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import pytest
+from django.urls import URLPattern, URLResolver, resolve
+from rest_framework.test import APIClient
+from tests.query_budget import QueryBudget
+from tests.test_api.factories import (
+    IngredientFactory,
+    IngredientInRecipeFactory,
+    RecipeFactory,
+    TagFactory,
+    UserFactory,
+)
+
+from api import urls
+from recipes.models import Cart, Favorite, Subscribe
+
+pytestmark = pytest.mark.django_db
+
+PASSWORD = 'Pa55-word-for-budget'
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAD'
+    'UlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+def recipe_payload(ids: dict) -> dict:
+    return {
+        'ingredients': [
+            {'id': ingredient, 'amount': 2}
+            for ingredient in ids['ingredients']
+        ],
+        'tags': ids['tags'],
+        'image': IMAGE,
+        'name': 'рецепт',
+        'text': 'описание',
+        'cooking_time': 10,
+    }
+
+
+def route(
+    name: str,
+    method: str,
+    path: str,
+    budget: int,
+    payload: Optional[Callable[[dict], dict]] = None,
+    anonymous: bool = False,
+    status: HTTPStatus = HTTPStatus.OK,
+):
+    return pytest.param(
+        name,
+        method,
+        path,
+        payload,
+        anonymous,
+        status,
+        marks=pytest.mark.query_budget(budget),
+        id=f'{name}-{method}',
+    )
+
+
+ROUTES = (
+    route('customuser-list', 'get', '/api/users/', 3),
+    route(
+        'customuser-list',
+        'post',
+        '/api/users/',
+        5,
+        lambda ids: {
+            'email': 'new@example.com',
+            'username': 'new',
+            'first_name': 'Новый',
+            'last_name': 'Пользователь',
+            'password': PASSWORD,
+        },
+        anonymous=True,
+        status=HTTPStatus.CREATED,
+    ),
+    route('customuser-detail', 'get', '/api/users/{author}/', 2),
+    route('customuser-me', 'get', '/api/users/me/', 2),
+    route('customuser-subscriptions', 'get', '/api/users/subscriptions/', 5),
+    route(
+        'customuser-subscribe',
+        'post',
+        '/api/users/{stranger}/subscribe/',
+        8,
+        status=HTTPStatus.CREATED,
+    ),
+    route(
+        'customuser-subscribe',
+        'delete',
+        '/api/users/{author}/subscribe/',
+        5,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'customuser-set-password',
+        'post',
+        '/api/users/set_password/',
+        1,
+        lambda ids: {
+            'current_password': PASSWORD,
+            'new_password': f'{PASSWORD}-new',
+        },
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'customuser-set-username',
+        'post',
+        '/api/users/set_username/',
+        1,
+        lambda ids: {
+            'current_password': PASSWORD,
+            'new_email': ids['email'],
+        },
+        status=HTTPStatus.BAD_REQUEST,
+    ),
+    route(
+        'customuser-reset-username',
+        'post',
+        '/api/users/reset_username/',
+        1,
+        lambda ids: {'email': 'nobody@example.com'},
+        anonymous=True,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'customuser-reset-username-confirm',
+        'post',
+        '/api/users/reset_username_confirm/',
+        2,
+        lambda ids: {'uid': 'MQ', 'token': 'x', 'new_email': 'a@example.com'},
+        anonymous=True,
+        status=HTTPStatus.BAD_REQUEST,
+    ),
+    route(
+        'customuser-reset-password',
+        'post',
+        '/api/users/reset_password/',
+        1,
+        lambda ids: {'email': 'nobody@example.com'},
+        anonymous=True,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'customuser-reset-password-confirm',
+        'post',
+        '/api/users/reset_password_confirm/',
+        1,
+        lambda ids: {'uid': 'MQ', 'token': 'x', 'new_password': PASSWORD},
+        anonymous=True,
+        status=HTTPStatus.BAD_REQUEST,
+    ),
+    route(
+        'customuser-activation',
+        'post',
+        '/api/users/activation/',
+        1,
+        lambda ids: {'uid': 'MQ', 'token': 'x'},
+        anonymous=True,
+        status=HTTPStatus.BAD_REQUEST,
+    ),
+    route(
+        'customuser-resend-activation',
+        'post',
+        '/api/users/resend_activation/',
+        1,
+        lambda ids: {'email': ids['email']},
+        anonymous=True,
+        status=HTTPStatus.BAD_REQUEST,
+    ),
+    route('tag-list', 'get', '/api/tags/', 1),
+    route('tag-detail', 'get', '/api/tags/{tag}/', 1),
+    route('ingredient-list', 'get', '/api/ingredients/?name=с', 2),
+    route('ingredient-detail', 'get', '/api/ingredients/{ingredient}/', 1),
+    route('recipes-list', 'get', '/api/recipes/', 7),
+    route('recipes-list', 'get', '/api/recipes/', 6, anonymous=True),
+    route(
+        'recipes-list',
+        'get',
+        '/api/recipes/?is_favorited=1&is_in_shopping_cart=1',
+        7,
+    ),
+    route('recipes-list', 'get', '/api/recipes/?tags={tag_slug}', 8),
+    route(
+        'recipes-list',
+        'post',
+        '/api/recipes/',
+        13,
+        recipe_payload,
+        status=HTTPStatus.CREATED,
+    ),
+    route('recipes-detail', 'get', '/api/recipes/{recipe}/', 6),
+    route(
+        'recipes-detail', 'patch', '/api/recipes/{own}/', 15, recipe_payload
+    ),
+    route(
+        'recipes-detail',
+        'delete',
+        '/api/recipes/{own}/',
+        7,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'recipes-download-shopping-cart',
+        'get',
+        '/api/recipes/download_shopping_cart/',
+        1,
+    ),
+    route(
+        'favorite',
+        'post',
+        '/api/recipes/{recipe}/favorite/',
+        7,
+        status=HTTPStatus.CREATED,
+    ),
+    route(
+        'favorite',
+        'delete',
+        '/api/recipes/{favorite}/favorite/',
+        8,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'cart',
+        'post',
+        '/api/recipes/{recipe}/shopping_cart/',
+        7,
+        status=HTTPStatus.CREATED,
+    ),
+    route(
+        'cart',
+        'delete',
+        '/api/recipes/{cart}/shopping_cart/',
+        8,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route(
+        'favorite-batch',
+        'post',
+        '/api/recipes/favorite/',
+        6,
+        lambda ids: {'recipes': ids['recipes']},
+    ),
+    route(
+        'favorite-batch',
+        'delete',
+        '/api/recipes/favorite/',
+        6,
+        lambda ids: {'recipes': ids['recipes']},
+    ),
+    route(
+        'cart-batch',
+        'post',
+        '/api/recipes/shopping_cart/',
+        6,
+        lambda ids: {'recipes': ids['recipes']},
+    ),
+    route(
+        'cart-batch',
+        'delete',
+        '/api/recipes/shopping_cart/',
+        6,
+        lambda ids: {'recipes': ids['recipes']},
+    ),
+    route(
+        'login',
+        'post',
+        '/api/auth/token/login/',
+        6,
+        lambda ids: {'email': ids['email'], 'password': PASSWORD},
+        anonymous=True,
+    ),
+    route(
+        'logout',
+        'post',
+        '/api/auth/token/logout/',
+        1,
+        status=HTTPStatus.NO_CONTENT,
+    ),
+    route('schema', 'get', '/api/docs/schema/', 8, anonymous=True),
+    route('swagger-ui', 'get', '/api/docs/swagger-ui/', 0, anonymous=True),
+)
+
+
+def route_names(patterns: list) -> set[str]:
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def test_every_route_has_a_budget() -> None:
+    assert route_names(urls.urlpatterns) == {
+        param.values[0] for param in ROUTES
+    }
+
+
+def test_report_lists_duplicated_sql() -> None:
+    budget = QueryBudget(2)
+    budget.start(environ={'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/'})
+    for sql in (
+        'SELECT 1 FROM a WHERE id = %s',
+        'SELECT 1 FROM b WHERE id IN (%s, %s)',
+        'SELECT 1 FROM a WHERE id = %s',
+        'SELECT 1 FROM b WHERE id IN (%s, %s, %s)',
+        'SELECT 1 FROM a WHERE id = %s',
+    ):
+        budget.record(lambda *args: None, sql, (), False, {})
+    budget.finish()
+    budget.start(environ={'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/'})
+    budget.finish()
+    assert budget.report() == '\n'.join(
+        (
+            'GET /api/: 5 queries, the budget is 2.',
+            'Duplicated SQL:',
+            '  3 x SELECT 1 FROM a WHERE id = %s',
+            '  2 x SELECT 1 FROM b WHERE id IN (%s, ...)',
+        )
+    )
+
+
+@pytest.fixture()
+def ids(api_client: APIClient) -> dict:
+    user = UserFactory.create(username='reader', email='reader@example.com')
+    user.set_password(PASSWORD)
+    user.save()
+    api_client.force_authenticate(user)
+    tags = TagFactory.create_batch(3)
+    ingredients = IngredientFactory.create_batch(3)
+    authors = [
+        UserFactory.create(username=f'author-{number}') for number in range(3)
+    ]
+    recipes = []
+    for author in authors:
+        Subscribe.objects.create(user=user, author=author)
+        for recipe in RecipeFactory.create_batch(3, author=author, tags=tags):
+            IngredientInRecipeFactory.create_batch(2, recipe=recipe)
+            recipes.append(recipe)
+    own = RecipeFactory.create(author=user, tags=tags)
+    for recipe in recipes[:4]:
+        Favorite.objects.create(author=user, recipe=recipe)
+        Cart.objects.create(author=user, recipe=recipe)
+    return {
+        'email': user.email,
+        'author': authors[0].pk,
+        'stranger': UserFactory.create(username='stranger').pk,
+        'tag': tags[0].pk,
+        'tag_slug': tags[0].slug,
+        'tags': [tag.pk for tag in tags],
+        'ingredient': ingredients[0].pk,
+        'ingredients': [ingredient.pk for ingredient in ingredients],
+        'recipe': recipes[-1].pk,
+        'recipes': [recipe.pk for recipe in recipes[2:6]],
+        'favorite': recipes[0].pk,
+        'cart': recipes[1].pk,
+        'own': own.pk,
+    }
+
+
+@pytest.mark.parametrize(
+    'name, method, path, payload, anonymous, status',
+    ROUTES,
+)
+def test_route_query_budget(
+    api_client: APIClient,
+    ids: dict,
+    name: str,
+    method: str,
+    path: str,
+    payload: Optional[Callable[[dict], dict]],
+    anonymous: bool,
+    status: HTTPStatus,
+) -> None:
+    url = path.format(**ids)
+    assert resolve(urlsplit(url).path).view_name == f'api:{name}'
+    if anonymous:
+        api_client.force_authenticate(None)
+    response = getattr(api_client, method)(
+        url,
+        payload and payload(ids),
+        format='json',
+    )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    assert response.status_code == status
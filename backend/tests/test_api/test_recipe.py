@@ -1,14 +1,48 @@
+import base64
+import io
 import json
 from http import HTTPStatus
 from typing import Callable
 
 import pytest
-from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.files.storage import default_storage, storages
+from django.db import connection
+from django.http import HttpRequest, HttpResponseBase
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from openpyxl import load_workbook
+from PIL import Image, ImageFont
+from pypdf import PdfReader
+from pypdf.generic import DictionaryObject
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+from tests.test_api.factories import (
+    CartFactory,
+    FavoriteFactory,
+    IngredientFactory,
+    IngredientInRecipeFactory,
+    RecipeFactory,
+    TagFactory,
+    UserFactory,
+)
 from tests.utils import check_types
 
+from api.filters import RecipeFilterSet
+from api.views import RecipeViewSet
+from recipes.images import schedule_recipe_image
+from recipes.models import IngredientInRecipe, Recipe
+from recipes.storage import walk
+
 pytestmark = pytest.mark.django_db
 
 ENDPOINT = '/api/recipes/'
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAD'
+    'UlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
 
 
 class TestGetRecipeList:
@@ -59,8 +93,11 @@ class TestGetRecipeList:
             'is_in_shopping_cart': bool,
             'name': str,
             'image': str,
+            'image_variants': dict,
             'text': str,
             'cooking_time': int,
+            'favorites_count': int,
+            'carts_count': int,
         }
         fill_recipe_without_m2m_batch(1)
         response = api_client.get(ENDPOINT)
@@ -95,6 +132,27 @@ class TestGetRecipeList:
             api_results[0].get('ingredients') == expected
         ), 'Список ингредиентов в ответе API не соответствует ожидаемому.'
 
+    @pytest.mark.parametrize('authenticated', (False, True))
+    def test_query_count_does_not_depend_on_page_size(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        authenticated: bool,
+    ) -> None:
+        if authenticated:
+            api_client.force_authenticate(UserFactory.create())
+        fill_recipe_full_batch(2)
+        with CaptureQueriesContext(connection) as small_page:
+            api_client.get(ENDPOINT)
+        fill_recipe_full_batch(10)
+        with CaptureQueriesContext(connection) as large_page:
+            response = api_client.get(ENDPOINT)
+        assert len(json.loads(response.content).get('results')) == 12
+        assert len(large_page) == len(small_page), (
+            'Количество запросов к БД при получении списка рецептов '
+            'зависит от количества рецептов на странице.'
+        )
+
 
 class TestGetRecipe:
     def test_retrieve_recipe_with_tags(
@@ -102,10 +160,9 @@ class TestGetRecipe:
         api_client: APIClient,
         fill_recipe_with_tags_batch: Callable,
     ) -> None:
-        required_id = 3
-        recipe = fill_recipe_with_tags_batch()[required_id - 1]
-        tag = recipe.tags.get(pk=1)
-        response = api_client.get(f'{ENDPOINT}{required_id}/')
+        recipe = fill_recipe_with_tags_batch()[2]
+        tag = recipe.tags.get()
+        response = api_client.get(f'{ENDPOINT}{recipe.pk}/')
         api_content = json.loads(response.content)
         expected = {
             'id': recipe.pk,
@@ -129,10 +186,9 @@ class TestGetRecipe:
         api_client: APIClient,
         fill_recipe_with_ingredients_batch: Callable,
     ) -> None:
-        required_id = 3
-        ingredient = fill_recipe_with_ingredients_batch()[required_id - 1]
+        ingredient = fill_recipe_with_ingredients_batch()[2]
         recipe = ingredient.ingredientinrecipe.get().recipe
-        response = api_client.get(f'{ENDPOINT}{required_id}/')
+        response = api_client.get(f'{ENDPOINT}{recipe.pk}/')
         api_content = json.loads(response.content)
         expected = {
             'id': recipe.pk,
@@ -143,7 +199,7 @@ class TestGetRecipe:
                 'username': recipe.author.username,
                 'first_name': recipe.author.first_name,
                 'last_name': recipe.author.last_name,
-                # 'is_subscribed': 'false',
+                'is_subscribed': False,
             },
             'ingredients': [
                 {
@@ -153,12 +209,18 @@ class TestGetRecipe:
                     'amount': ingredient.ingredientinrecipe.get().amount,
                 }
             ],
-            'is_favorited': bool(recipe.favorite_count),
-            'is_in_shopping_cart': bool(recipe.in_shopping_cart_count),
+            'is_favorited': False,
+            'is_in_shopping_cart': False,
             'name': recipe.name,
             'image': ''.join(('http://testserver', recipe.image.url)),
+            'image_variants': dict.fromkeys(
+                ('full', 'card', 'thumbnail'),
+                ''.join(('http://testserver', recipe.image.url)),
+            ),
             'text': recipe.text,
             'cooking_time': recipe.cooking_time,
+            'favorites_count': 0,
+            'carts_count': 0,
         }
         assert api_content == expected, (
             'Хотя бы одно поле в запрошенном '
@@ -176,7 +238,773 @@ class TestGetRecipe:
             json.loads(response.content) == expected
         ), 'Неверное описание ошибки 404.'
 
+    def test_retrieve_recipe_non_numeric_id(
+        self,
+        api_client: APIClient,
+    ) -> None:
+        url = f'{ENDPOINT}abc/'
+        response = api_client.get(url)
+        assert (
+            response.status_code == HTTPStatus.NOT_FOUND
+        ), f'Неверный код ответа API с эндпоинта `{url}`.'
+
+
+class TestRecipeCursorPagination:
+    def test_walks_all_recipes_forward_and_back(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+    ) -> None:
+        recipes = fill_recipe_without_m2m_batch(7)
+        Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes[:4]]
+        ).update(pub_date=recipes[0].pub_date)
+        expected = list(
+            Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        pages, url = [], f'{ENDPOINT}?pagination=cursor&limit=3'
+        while url:
+            content = json.loads(api_client.get(url).content)
+            assert 'count' not in content
+            pages.append([recipe['id'] for recipe in content['results']])
+            previous, url = content['previous'], content['next']
+        assert sum(pages, []) == expected
+        content = json.loads(api_client.get(previous).content)
+        assert [recipe['id'] for recipe in content['results']] == pages[-2]
+
+    @pytest.mark.parametrize(
+        'ordering',
+        ('-favorites_count', 'favorites_count', 'pub_date'),
+    )
+    def test_follows_ordering(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+        ordering: str,
+    ) -> None:
+        recipes = fill_recipe_without_m2m_batch(7)
+        for count, recipe in zip((2, 0, 2, 1, 0, 2, 1), recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(favorites_count=count)
+        expected = list(
+            Recipe.objects.order_by(ordering, '-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        pages, url = [], f'{ENDPOINT}?pagination=cursor&limit=3'
+        url = f'{url}&ordering={ordering}'
+        while url:
+            content = json.loads(api_client.get(url).content)
+            pages.append([recipe['id'] for recipe in content['results']])
+            previous, url = content['previous'], content['next']
+        assert sum(pages, []) == expected
+        content = json.loads(api_client.get(previous).content)
+        assert [recipe['id'] for recipe in content['results']] == pages[-2]
+
+    def test_skips_count_query(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+    ) -> None:
+        fill_recipe_without_m2m_batch(3)
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(ENDPOINT, {'pagination': 'cursor'})
+        assert len(json.loads(response.content)['results']) == 3
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        )
+        response = api_client.get(
+            ENDPOINT,
+            {'pagination': 'cursor', 'count': 'true'},
+        )
+        assert json.loads(response.content)['count'] == 3
+
+    def test_invalid_cursor(self, api_client: APIClient) -> None:
+        response = api_client.get(ENDPOINT, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestRecipeCounters:
+    @pytest.mark.parametrize(
+        'suffix, field',
+        (('favorite', 'favorites_count'), ('shopping_cart', 'carts_count')),
+    )
+    def test_counter_follows_create_and_destroy(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+        suffix: str,
+        field: str,
+    ) -> None:
+        recipe = fill_recipe_without_m2m_batch(1)[0]
+        url = f'{ENDPOINT}{recipe.pk}/{suffix}/'
+        for user in UserFactory.create_batch(2):
+            api_client.force_authenticate(user)
+            assert api_client.post(url).status_code == HTTPStatus.CREATED
+        content = json.loads(api_client.get(f'{ENDPOINT}{recipe.pk}/').content)
+        assert content[field] == 2
+        assert api_client.delete(url).status_code == HTTPStatus.NO_CONTENT
+        recipe.refresh_from_db()
+        assert getattr(recipe, field) == 1
+
+    def test_recipe_save_keeps_counters(
+        self,
+        fill_recipe_without_m2m_batch: Callable,
+    ) -> None:
+        recipe = fill_recipe_without_m2m_batch(1)[0]
+        Recipe.objects.filter(pk=recipe.pk).shift_counter('carts_count', 1)
+        recipe.name = 'новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        assert recipe.carts_count == 1
+
+    def test_ordering_by_favorites_count(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+    ) -> None:
+        recipes = fill_recipe_without_m2m_batch(3)
+        Recipe.objects.filter(pk=recipes[0].pk).update(favorites_count=5)
+        Recipe.objects.filter(pk=recipes[2].pk).update(favorites_count=1)
+        response = api_client.get(ENDPOINT, {'ordering': '-favorites_count'})
+        assert [
+            recipe['id'] for recipe in json.loads(response.content)['results']
+        ] == [recipes[0].pk, recipes[2].pk, recipes[1].pk]
+
+
+class TestRecipeTagFilter:
+    @pytest.fixture()
+    def tags(self) -> list:
+        return [
+            TagFactory.create(slug=slug)
+            for slug in ('soup', 'soup-hot', 'pie')
+        ]
+
+    def get_ids(self, api_client: APIClient, *slugs: str) -> list[int]:
+        response = api_client.get(ENDPOINT, {'tags': slugs})
+        assert response.status_code == HTTPStatus.OK
+        return [
+            recipe['id'] for recipe in json.loads(response.content)['results']
+        ]
+
+    def test_any_of_tags_without_duplicates(
+        self,
+        api_client: APIClient,
+        tags: list,
+    ) -> None:
+        soup, hot, pie = tags
+        both = RecipeFactory.create(tags=[soup, pie])
+        only_pie = RecipeFactory.create(tags=[pie])
+        RecipeFactory.create(tags=[hot])
+        assert sorted(self.get_ids(api_client, 'soup', 'pie')) == sorted(
+            [both.pk, only_pie.pk]
+        )
+
+    def test_slug_matches_exactly(
+        self,
+        api_client: APIClient,
+        tags: list,
+    ) -> None:
+        soup, hot, _ = tags
+        recipe = RecipeFactory.create(tags=[soup])
+        RecipeFactory.create(tags=[hot])
+        assert self.get_ids(api_client, 'soup') == [recipe.pk]
+
+    def test_unknown_slug(self, api_client: APIClient, tags: list) -> None:
+        response = api_client.get(ENDPOINT, {'tags': 'cake'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_slugs_are_resolved_once(
+        self,
+        api_client: APIClient,
+        tags: list,
+    ) -> None:
+        RecipeFactory.create(tags=tags)
+        api_client.get(ENDPOINT, {'tags': 'soup'})
+        with CaptureQueriesContext(connection) as unfiltered:
+            api_client.get(ENDPOINT)
+        with CaptureQueriesContext(connection) as filtered:
+            api_client.get(ENDPOINT, {'tags': ['soup', 'pie']})
+        assert len(filtered) == len(unfiltered)
+        TagFactory.create(slug='cake')
+        assert self.get_ids(api_client, 'cake') == []
+
+
+@pytest.mark.parametrize(
+    'param, factory, index',
+    (
+        ('is_favorited', FavoriteFactory, 'unique_favorite_recipe'),
+        ('is_in_shopping_cart', CartFactory, 'unique_cart_recipe'),
+    ),
+)
+class TestRecipeUserListFilters:
+    @pytest.fixture()
+    def user(self, api_client: APIClient):
+        user = UserFactory.create()
+        api_client.force_authenticate(user)
+        return user
+
+    def test_own_list_with_tags(
+        self,
+        api_client: APIClient,
+        user,
+        param: str,
+        factory: type,
+        index: str,
+    ) -> None:
+        soup, pie = TagFactory.create_batch(2)
+        listed, other = RecipeFactory.create_batch(2, tags=[soup, pie])
+        RecipeFactory.create(tags=[soup])
+        factory.create(author=user, recipe=listed)
+        factory.create_batch(3, recipe=listed)
+        factory.create(recipe=other)
+        response = api_client.get(
+            ENDPOINT,
+            {param: 1, 'tags': [soup.slug, pie.slug]},
+        )
+        content = json.loads(response.content)
+        assert [recipe['id'] for recipe in content['results']] == [listed.pk]
+        assert content['count'] == 1
+
+    def test_filter_is_exists_on_unique_index(
+        self,
+        user,
+        param: str,
+        factory: type,
+        index: str,
+    ) -> None:
+        factory.create(author=user)
+        request = APIRequestFactory().get(ENDPOINT)
+        request.user = user
+        queryset = RecipeFilterSet(
+            {param: 'true'},
+            queryset=Recipe.objects.order_by('-pub_date', '-id'),
+            request=request,
+        ).qs[:6]
+        assert 'EXISTS' in str(queryset.query)
+        if connection.vendor != 'postgresql':
+            pytest.skip('The plan is checked on PostgreSQL only.')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        assert index in plan
+        assert 'Seq Scan' not in plan
+
+
+class TestRecipeConditionalGet:
+    def test_not_modified_without_serialization(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        django_assert_max_num_queries,
+    ) -> None:
+        fill_recipe_full_batch(3)
+        etag = api_client.get(ENDPOINT)['ETag']
+        with django_assert_max_num_queries(1):
+            response = api_client.get(ENDPOINT, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert response.content == b''
+
+    def test_etag_changes_on_recipe_update(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+    ) -> None:
+        recipe = fill_recipe_full_batch(1)[0]
+        url = f'{ENDPOINT}{recipe.pk}/'
+        etag = api_client.get(url)['ETag']
+        recipe.name = 'новое название'
+        recipe.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content)['name'] == 'новое название'
+        assert response['ETag'] != etag
+
+    def test_list_etag_follows_rows_outside_the_page(
+        self,
+        api_client: APIClient,
+        fill_recipe_without_m2m_batch: Callable,
+    ) -> None:
+        oldest = fill_recipe_without_m2m_batch(3)[0]
+        etag = api_client.get(ENDPOINT, {'limit': 1})['ETag']
+        oldest.delete()
+        response = api_client.get(
+            ENDPOINT,
+            {'limit': 1},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content)['count'] == 2
+
+    def test_etag_changes_on_shopping_cart_update(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+    ) -> None:
+        user = UserFactory.create()
+        api_client.force_authenticate(user)
+        recipe = fill_recipe_full_batch(1)[0]
+        url = f'{ENDPOINT}{recipe.pk}/'
+        etag = api_client.get(url)['ETag']
+        CartFactory.create(author=user, recipe=recipe)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content)['is_in_shopping_cart'] is True
+
+    def test_etag_depends_on_user(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+    ) -> None:
+        fill_recipe_full_batch(1)
+        etag = api_client.get(ENDPOINT)['ETag']
+        api_client.force_authenticate(UserFactory.create())
+        response = api_client.get(ENDPOINT, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+
+class TestAsyncRecipeRetrieve:
+    @pytest.fixture()
+    def view(self, settings, monkeypatch: pytest.MonkeyPatch) -> Callable:
+        resolve(ENDPOINT)
+        settings.ASGI = True
+        view = async_to_sync(RecipeViewSet.as_view({'get': 'retrieve'}))
+
+        def retrieve(request: HttpRequest, pk: str) -> HttpResponseBase:
+            monkeypatch.setattr(RecipeViewSet, 'retrieve', None)
+            return view(request, pk=pk)
+
+        return retrieve
+
+    def test_matches_sync_response(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        view: Callable,
+    ) -> None:
+        recipe = fill_recipe_full_batch(1)[0]
+        url = f'{ENDPOINT}{recipe.pk}/'
+        expected = api_client.get(url)
+        response = view(APIRequestFactory().get(url), str(recipe.pk))
+        assert response.status_code == HTTPStatus.OK
+        assert response.rendered_content == expected.content
+        assert response['ETag'] == expected['ETag']
+
+    def test_not_modified(
+        self,
+        api_client: APIClient,
+        fill_recipe_full_batch: Callable,
+        view: Callable,
+        django_assert_max_num_queries,
+    ) -> None:
+        recipe = fill_recipe_full_batch(1)[0]
+        url = f'{ENDPOINT}{recipe.pk}/'
+        etag = api_client.get(url)['ETag']
+        request = APIRequestFactory().get(url, HTTP_IF_NONE_MATCH=etag)
+        with django_assert_max_num_queries(1):
+            response = view(request, str(recipe.pk))
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    @pytest.mark.parametrize('pk', ('1', 'abc'))
+    def test_not_found(self, view: Callable, pk: str) -> None:
+        response = view(APIRequestFactory().get(f'{ENDPOINT}{pk}/'), pk)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestDownloadShoppingCart:
+    @pytest.fixture()
+    def cart_owner(self, api_client: APIClient):
+        user = UserFactory.create()
+        api_client.force_authenticate(user)
+        return user
+
+    @pytest.fixture()
+    def shopping_cart(self, cart_owner, fill_recipe_full_batch):
+        ingredient = IngredientFactory.create(
+            pk=123456,
+            name='соль',
+            measurement_unit='г',
+        )
+        for recipe in fill_recipe_full_batch(2):
+            IngredientInRecipeFactory.create(
+                recipe=recipe,
+                ingredient=ingredient,
+                amount=5,
+            )
+            CartFactory.create(author=cart_owner, recipe=recipe)
+        return ingredient
+
+    @pytest.mark.parametrize(
+        'file_format, header, line',
+        (
+            ('csv', 'id,name,amount,measurement_unit', '{},соль,10,г'),
+            ('txt', 'id name amount measurement_unit', '{} соль 10 г'),
+        ),
+    )
+    def test_download(
+        self,
+        api_client: APIClient,
+        shopping_cart,
+        file_format: str,
+        header: str,
+        line: str,
+    ) -> None:
+        response = api_client.get(
+            f'{ENDPOINT}download_shopping_cart/',
+            {'format': file_format},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        assert response['Content-Disposition'] == (
+            'attachment; '
+            f'filename="recipes_from_shopping_cart.{file_format}"'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == header
+        assert len(lines) == 6, 'Неверное количество строк в списке покупок.'
+        assert line.format(shopping_cart.pk) in lines
+
+    def test_download_streams_under_asgi(
+        self,
+        settings,
+        cart_owner,
+        shopping_cart,
+    ) -> None:
+        settings.ASGI = True
+        token = Token.objects.create(user=cart_owner)
+
+        async def download() -> tuple[bool, bytes]:
+            response = await AsyncClient().get(
+                f'{ENDPOINT}download_shopping_cart/',
+                {'format': 'csv'},
+                headers={'Authorization': f'Token {token.key}'},
+            )
+            assert response.status_code == HTTPStatus.OK
+            content = [chunk async for chunk in response.streaming_content]
+            return response.is_async, b''.join(content)
+
+        is_async, content = async_to_sync(download)()
+        assert is_async, 'Список покупок буферизуется под ASGI.'
+        lines = content.decode().splitlines()
+        assert len(lines) == 6, 'Неверное количество строк в списке покупок.'
+        assert f'{shopping_cart.pk},соль,10,г' in lines
+
+    def test_download_pdf(self, api_client: APIClient, shopping_cart) -> None:
+        response = api_client.get(
+            f'{ENDPOINT}download_shopping_cart/',
+            {'format': 'pdf'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        assert response['Content-Type'] == 'application/pdf'
+        content = b''.join(response.streaming_content)
+        reader = PdfReader(io.BytesIO(content), strict=True)
+        page = reader.pages[0]
+        lines = page.extract_text().splitlines()
+        assert lines[0] == 'id name amount measurement_unit'
+        assert f'{shopping_cart.pk} соль 10 г' in lines
+        resources = page['/Resources']
+        assert isinstance(resources, DictionaryObject)
+        font = next(iter(resources['/Font'].values())).get_object()
+        codes, code = {}, 0
+        for item in font['/Encoding']['/Differences']:
+            if isinstance(item, int):
+                code = item
+            else:
+                codes[chr(int(item[len('/uni') :], 16))] = code
+                code += 1
+        program = font['/FontDescriptor']['/FontFile2'].get_data()
+        glyphs = ImageFont.truetype(io.BytesIO(program), 1000)
+        for char in 'соль':
+            width = font['/Widths'][codes[char] - font['/FirstChar']]
+            assert (
+                abs(width - glyphs.getlength(char)) <= 1
+            ), f'Ширина символа `{char}` не совпадает со шрифтом.'
+
+    def test_download_xlsx(
+        self,
+        api_client: APIClient,
+        shopping_cart,
+    ) -> None:
+        response = api_client.get(
+            f'{ENDPOINT}download_shopping_cart/',
+            {'format': 'xlsx'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        content = b''.join(response.streaming_content)
+        workbook = load_workbook(io.BytesIO(content), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        assert rows[0] == ('id', 'name', 'amount', 'measurement_unit')
+        assert len(rows) == 6, 'Неверное количество строк в списке покупок.'
+        assert (shopping_cart.pk, 'соль', 10, 'г') in rows
+
 
 class TestPostRecipe:
     def test_create_recipe_ok(self):
         pass
+
+
+class TestWriteRecipeIngredients:
+    @pytest.fixture()
+    def author(self, api_client: APIClient):
+        user = UserFactory.create()
+        api_client.force_authenticate(user)
+        return user
+
+    @staticmethod
+    def payload(ingredients: dict, tags: list) -> dict:
+        return {
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': amount}
+                for ingredient, amount in ingredients.items()
+            ],
+            'tags': [tag.pk for tag in tags],
+            'image': IMAGE,
+            'name': 'рецепт',
+            'text': 'описание',
+            'cooking_time': 10,
+        }
+
+    @staticmethod
+    def amounts(recipe_id: int) -> dict:
+        return dict(
+            IngredientInRecipe.objects.filter(recipe=recipe_id).values_list(
+                'ingredient',
+                'amount',
+            )
+        )
+
+    def test_create_and_update_diff(
+        self,
+        api_client: APIClient,
+        author,
+        fill_tag_batch: Callable,
+    ) -> None:
+        tags = fill_tag_batch(1)
+        kept, changed, removed, added = IngredientFactory.create_batch(4)
+        response = api_client.post(
+            ENDPOINT,
+            self.payload({kept: 1, changed: 2, removed: 3}, tags),
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        recipe_id = json.loads(response.content)['id']
+        response = api_client.patch(
+            f'{ENDPOINT}{recipe_id}/',
+            self.payload({kept: 1, changed: 5, added: 7}, tags),
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.amounts(recipe_id) == {
+            kept.pk: 1,
+            changed.pk: 5,
+            added.pk: 7,
+        }
+
+    def test_ingredient_write_queries_are_bounded(
+        self,
+        api_client: APIClient,
+        author,
+        fill_tag_batch: Callable,
+    ) -> None:
+        tags = fill_tag_batch(1)
+        ingredients = IngredientFactory.create_batch(60)
+        with CaptureQueriesContext(connection) as created:
+            response = api_client.post(
+                ENDPOINT,
+                self.payload(dict.fromkeys(ingredients[:40], 1), tags),
+                format='json',
+            )
+        recipe_id = json.loads(response.content)['id']
+        with CaptureQueriesContext(connection) as updated:
+            api_client.patch(
+                f'{ENDPOINT}{recipe_id}/',
+                self.payload(
+                    {
+                        **dict.fromkeys(ingredients[:20], 1),
+                        **dict.fromkeys(ingredients[20:30], 2),
+                        **dict.fromkeys(ingredients[40:], 3),
+                    },
+                    tags,
+                ),
+                format='json',
+            )
+        assert len(self.amounts(recipe_id)) == 50
+        for context, limit in ((created, 1), (updated, 4)):
+            writes = [
+                query['sql']
+                for query in context.captured_queries
+                if 'recipes_ingredientinrecipe' in query['sql']
+                and not query['sql'].startswith('SELECT')
+            ]
+            assert len(writes) <= limit, writes
+
+    def test_query_count_does_not_depend_on_ingredients_count(
+        self,
+        api_client: APIClient,
+        author,
+        fill_tag_batch: Callable,
+    ) -> None:
+        tags = fill_tag_batch(5)
+        ingredients = IngredientFactory.create_batch(40)
+        with CaptureQueriesContext(connection) as small:
+            api_client.post(
+                ENDPOINT,
+                self.payload(dict.fromkeys(ingredients[:2], 1), tags[:1]),
+                format='json',
+            )
+        with CaptureQueriesContext(connection) as large:
+            response = api_client.post(
+                ENDPOINT,
+                self.payload(dict.fromkeys(ingredients, 1), tags),
+                format='json',
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(json.loads(response.content)['ingredients']) == 40
+        assert len(large) == len(small), (
+            'Количество запросов к БД при создании рецепта '
+            'зависит от количества ингредиентов и меток.'
+        )
+
+    def test_missing_ids_are_reported(
+        self,
+        api_client: APIClient,
+        author,
+        fill_tag_batch: Callable,
+    ) -> None:
+        tag = fill_tag_batch(1)[0]
+        ingredient = IngredientFactory.create()
+        payload = self.payload({ingredient: 1}, [tag])
+        payload['ingredients'] += [
+            {'id': ingredient.pk + 7, 'amount': 1},
+            {'id': ingredient.pk + 3, 'amount': 1},
+        ]
+        payload['tags'].append(tag.pk + 1)
+        response = api_client.post(ENDPOINT, payload, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert json.loads(response.content) == {
+            'ingredients': [
+                f'Ingredients with ids {ingredient.pk + 3}, '
+                f'{ingredient.pk + 7} do not exist.'
+            ],
+            'tags': [f'Objects with ids {tag.pk + 1} do not exist.'],
+        }
+
+
+class TestRecipeImage:
+    @staticmethod
+    def encode_image(size: tuple[int, int], line_length: int = 0) -> str:
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+        if line_length:
+            encoded = '\n'.join(
+                encoded[start:][:line_length]
+                for start in range(0, len(encoded), line_length)
+            )
+        return f'data:image/png;base64,{encoded}'
+
+    @pytest.fixture()
+    def payload(self, api_client: APIClient, fill_tag_batch: Callable):
+        api_client.force_authenticate(UserFactory.create())
+        return {
+            'ingredients': [
+                {'id': IngredientFactory.create().pk, 'amount': 1}
+            ],
+            'tags': [fill_tag_batch(1)[0].pk],
+            'name': 'рецепт',
+            'text': 'описание',
+            'cooking_time': 10,
+        }
+
+    def test_variants_built_after_commit(
+        self,
+        api_client: APIClient,
+        payload: dict,
+        django_capture_on_commit_callbacks,
+    ) -> None:
+        payload['image'] = self.encode_image((1600, 1200), line_length=76)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(ENDPOINT, payload, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        recipe = Recipe.objects.get(pk=json.loads(response.content)['id'])
+        assert recipe.image_variants.pop('source') == recipe.image.name
+        sizes = {}
+        for variant, name in recipe.image_variants.items():
+            with default_storage.open(name) as file:
+                sizes[variant] = Image.open(file).size
+        assert sizes == {
+            'full': (1280, 960),
+            'card': (480, 360),
+            'thumbnail': (160, 120),
+        }
+        content = json.loads(api_client.get(ENDPOINT).content)
+        assert content['results'][0]['image_variants'] == {
+            variant: f'http://testserver{default_storage.url(name)}'
+            for variant, name in recipe.image_variants.items()
+        }
+
+    def test_etag_changes_when_variants_built(
+        self,
+        api_client: APIClient,
+        payload: dict,
+        django_capture_on_commit_callbacks,
+    ) -> None:
+        payload['image'] = self.encode_image((800, 600))
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = api_client.post(ENDPOINT, payload, format='json')
+        url = f'{ENDPOINT}{json.loads(response.content)["id"]}/'
+        etag = api_client.get(url)['ETag']
+        for callback in callbacks:
+            callback()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        variants = json.loads(response.content)['image_variants']
+        assert (
+            len(set(variants.values())) == 3
+        ), 'После обработки изображения отдан устаревший ответ.'
+
+    def test_identical_uploads_share_files(
+        self,
+        api_client: APIClient,
+        payload: dict,
+        django_capture_on_commit_callbacks,
+    ) -> None:
+        payload['image'] = self.encode_image((800, 600))
+        for _ in range(2):
+            with django_capture_on_commit_callbacks(execute=True):
+                api_client.post(ENDPOINT, payload, format='json')
+        first, second = Recipe.objects.order_by('pk')
+        assert first.image.name == second.image.name
+        assert first.image_variants == second.image_variants
+        assert len(list(walk(storages['default'], settings.IMAGE_PATH))) == 4
+
+    @pytest.mark.parametrize(
+        'image',
+        ('data:image/png;base64,!!!!', 'data:image/png;base64,aGVsbG8='),
+    )
+    def test_invalid_image(
+        self,
+        api_client: APIClient,
+        payload: dict,
+        image: str,
+    ) -> None:
+        payload['image'] = image
+        response = api_client.post(ENDPOINT, payload, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'image' in json.loads(response.content)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_variants_built_in_worker_pool(settings) -> None:
+    settings.IMAGE_WORKERS = 1
+    recipe = RecipeFactory.create()
+    future = schedule_recipe_image(recipe.pk)
+    assert future is not None, 'Изображение обработано вне пула.'
+    future.result(timeout=10)
+    recipe.refresh_from_db()
+    assert recipe.image_variants['source'] == recipe.image.name
+    assert default_storage.exists(recipe.image_variants['thumbnail'])
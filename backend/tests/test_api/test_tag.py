@@ -3,9 +3,15 @@ from http import HTTPStatus
 from typing import Callable
 
 import pytest
-from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory
 from tests.test_api.factories import TagFactory
 
+from api.views import TagViewSet
+from recipes.cache import version_key
+from recipes.models import Tag
+
 pytestmark = pytest.mark.django_db
 
 ENDPOINT = '/api/tags/'
@@ -39,3 +45,107 @@ class TestTagEndpoints:
         response = api_client.get(f'{ENDPOINT}{1}/')
         assert response.status_code == HTTPStatus.NOT_FOUND
         assert json.loads(response.content) == expected
+
+
+class TestTagCache:
+    def test_list_served_from_cache(
+        self,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+        django_assert_num_queries,
+    ) -> None:
+        fill_tag_batch(3)
+        first = api_client.get(ENDPOINT)
+        with django_assert_num_queries(0):
+            second = api_client.get(ENDPOINT)
+        assert second.status_code == HTTPStatus.OK
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+
+    def test_not_modified(
+        self,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+    ) -> None:
+        fill_tag_batch(3)
+        etag = api_client.get(ENDPOINT)['ETag']
+        response = api_client.get(ENDPOINT, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b''
+
+    def test_invalidated_on_save(
+        self,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+    ) -> None:
+        tag = fill_tag_batch(1)[0]
+        etag = api_client.get(f'{ENDPOINT}{tag.pk}/')['ETag']
+        tag.name = 'новое имя'
+        tag.save()
+        response = api_client.get(
+            f'{ENDPOINT}{tag.pk}/',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert json.loads(response.content)['name'] == 'новое имя'
+
+    def test_evicted_version_does_not_go_back(
+        self,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+    ) -> None:
+        fill_tag_batch(1)
+        cache.clear()
+        api_client.get(ENDPOINT)
+        fill_tag_batch(1)
+        cache.delete(version_key(Tag))
+        response = api_client.get(ENDPOINT)
+        assert len(json.loads(response.content)) == 2
+
+    def test_async_list_served_from_cache(
+        self,
+        settings,
+        monkeypatch: pytest.MonkeyPatch,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+        django_assert_num_queries,
+    ) -> None:
+        fill_tag_batch(3)
+        first = api_client.get(ENDPOINT)
+        settings.ASGI = True
+        monkeypatch.setattr(TagViewSet, 'list', None)
+        view = TagViewSet.as_view({'get': 'list'})
+        with django_assert_num_queries(0):
+            second = async_to_sync(view)(APIRequestFactory().get(ENDPOINT))
+        assert second.status_code == HTTPStatus.OK
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+
+    def test_async_miss_falls_back_to_sync_view(
+        self,
+        settings,
+        fill_tag_batch: Callable,
+    ) -> None:
+        settings.ASGI = True
+        fill_tag_batch(2)
+        view = TagViewSet.as_view({'get': 'list'})
+        response = async_to_sync(view)(APIRequestFactory().get(ENDPOINT))
+        assert response.status_code == HTTPStatus.OK
+        assert len(json.loads(response.content)) == 2
+
+    def test_async_list_rejects_invalid_token(
+        self,
+        settings,
+        api_client: APIClient,
+        fill_tag_batch: Callable,
+    ) -> None:
+        fill_tag_batch(1)
+        api_client.get(ENDPOINT)
+        settings.ASGI = True
+        view = TagViewSet.as_view({'get': 'list'})
+        request = APIRequestFactory().get(
+            ENDPOINT,
+            HTTP_AUTHORIZATION='Token invalid',
+        )
+        response = async_to_sync(view)(request)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
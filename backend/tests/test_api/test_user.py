@@ -0,0 +1,78 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from tests.test_api.factories import (
+    RecipeFactory,
+    SubscribeFactory,
+    UserFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+ENDPOINT = '/api/users/subscriptions/'
+
+
+class TestGetSubscriptions:
+    @pytest.fixture()
+    def subscriber(self, api_client: APIClient):
+        user = UserFactory.create(username='subscriber')
+        api_client.force_authenticate(user)
+        return user
+
+    def subscribe_to_authors(self, subscriber, start: int, stop: int) -> None:
+        for number in range(start, stop):
+            author = UserFactory.create(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+            )
+            RecipeFactory.create_batch(3, author=author)
+            SubscribeFactory.create(author=author, user=subscriber)
+
+    def test_recipes_limit_and_count(
+        self,
+        api_client: APIClient,
+        subscriber,
+    ) -> None:
+        self.subscribe_to_authors(subscriber, 0, 2)
+        response = api_client.get(ENDPOINT, {'recipes_limit': 2})
+        assert response.status_code == HTTPStatus.OK
+        results = json.loads(response.content).get('results')
+        assert len(results) == 2
+        for author in results:
+            assert author.get('is_subscribed') is True
+            assert author.get('recipes_count') == 3
+            assert len(author.get('recipes')) == 2
+
+    def test_query_count_does_not_depend_on_authors_count(
+        self,
+        api_client: APIClient,
+        subscriber,
+    ) -> None:
+        self.subscribe_to_authors(subscriber, 0, 2)
+        with CaptureQueriesContext(connection) as few_authors:
+            api_client.get(ENDPOINT, {'recipes_limit': 2})
+        self.subscribe_to_authors(subscriber, 2, 10)
+        with CaptureQueriesContext(connection) as many_authors:
+            response = api_client.get(ENDPOINT, {'recipes_limit': 2})
+        assert len(json.loads(response.content).get('results')) == 10
+        assert len(many_authors) == len(few_authors), (
+            'Количество запросов к БД при получении подписок '
+            'зависит от количества авторов на странице.'
+        )
+
+    def test_not_modified_until_author_publishes(
+        self,
+        api_client: APIClient,
+        subscriber,
+    ) -> None:
+        self.subscribe_to_authors(subscriber, 0, 2)
+        etag = api_client.get(ENDPOINT)['ETag']
+        response = api_client.get(ENDPOINT, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        RecipeFactory.create(author=subscriber.subscriber.first().author)
+        response = api_client.get(ENDPOINT, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
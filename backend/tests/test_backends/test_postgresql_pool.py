@@ -0,0 +1,53 @@
+from typing import Iterator
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+pytest.importorskip('psycopg_pool')
+
+from foodgram.backends.postgresql.base import DatabaseWrapper  # noqa: E402
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def pooled() -> Iterator[DatabaseWrapper]:
+    wrapper = DatabaseWrapper(
+        {
+            **connection.settings_dict,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 1}},
+        },
+        alias=connection.alias,
+    )
+    yield wrapper
+    wrapper.close()
+    DatabaseWrapper.close_pools()
+
+
+def backend_pid(wrapper: DatabaseWrapper) -> int:
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+class TestConnectionPool:
+    def test_connection_returned_to_pool(
+        self,
+        pooled: DatabaseWrapper,
+    ) -> None:
+        pid = backend_pid(pooled)
+        pooled.close_if_unusable_or_obsolete()
+        assert pooled.connection is None
+        assert pooled.pool is not None
+        assert pooled.pool.get_stats()['pool_available'] == 1
+        assert backend_pid(pooled) == pid
+
+    def test_pool_requires_conn_max_age_zero(
+        self,
+        pooled: DatabaseWrapper,
+    ) -> None:
+        pooled.settings_dict['CONN_MAX_AGE'] = 60
+        with pytest.raises(ImproperlyConfigured):
+            pooled.pool
@@ -0,0 +1,32 @@
+import pytest
+from django.core.management import call_command
+from tests.test_api.factories import RecipeFactory
+
+from recipes.models import Recipe
+
+
+class TestBuildImageVariants:
+    @pytest.mark.django_db(transaction=True)
+    def test_backfills_in_parallel(self) -> None:
+        recipes = RecipeFactory.create_batch(3)
+        Recipe.objects.filter(pk=recipes[0].pk).update(
+            image_variants={'source': 'stale.jpg'},
+        )
+        call_command('build_image_variants', workers=2)
+        for recipe in Recipe.objects.all():
+            assert recipe.image_variants['source'] == recipe.image.name
+            assert recipe.image_variants.keys() == {
+                'source',
+                'full',
+                'card',
+                'thumbnail',
+            }
+
+    @pytest.mark.django_db()
+    def test_skips_up_to_date(self, capsys) -> None:
+        RecipeFactory.create_batch(2)
+        call_command('build_image_variants', workers=0)
+        call_command('build_image_variants', workers=0)
+        output = capsys.readouterr().out.splitlines()
+        assert output[-2] == 'Processing 0 images.'
+        assert output[-1].startswith('Done: variants built for 0 of 0 ')
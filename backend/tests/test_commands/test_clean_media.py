@@ -0,0 +1,53 @@
+import os
+import time
+
+import pytest
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from tests.test_api.factories import RecipeFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCleanMedia:
+    def save_file(self, content: bytes, age: int = 0) -> str:
+        name = default_storage.save(
+            f'{settings.IMAGE_PATH}/orphan.jpg',
+            ContentFile(content),
+        )
+        modified = time.time() - age
+        os.utime(default_storage.path(name), (modified, modified))
+        return name
+
+    def test_deletes_old_orphans(self, capsys) -> None:
+        recipe = RecipeFactory.create()
+        old = self.save_file(b'old orphan', age=7200)
+        young = self.save_file(b'young orphan')
+        call_command('clean_media', dry_run=True)
+        assert default_storage.exists(old)
+        call_command('clean_media')
+        assert not default_storage.exists(old)
+        assert default_storage.exists(young)
+        assert default_storage.exists(recipe.image.name)
+        output = capsys.readouterr().out.splitlines()
+        assert output == [
+            'Would delete 1 files, 0 KiB.',
+            'Deleted 1 files, 0 KiB.',
+        ]
+
+    def test_reuploaded_orphan_survives(self) -> None:
+        name = self.save_file(b'old orphan', age=7200)
+        default_storage.save(
+            f'{settings.IMAGE_PATH}/orphan.jpg',
+            ContentFile(b'old orphan'),
+        )
+        call_command('clean_media')
+        assert default_storage.exists(
+            name
+        ), 'Повторно загруженный файл удалён как устаревший.'
+
+    def test_empty_media(self, capsys) -> None:
+        call_command('clean_media')
+        assert capsys.readouterr().out == 'Deleted 0 files, 0 KiB.\n'
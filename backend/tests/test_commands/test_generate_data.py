@@ -0,0 +1,81 @@
+import pytest
+from django.core.management import call_command
+
+from recipes.models import (
+    Cart,
+    Favorite,
+    IngredientInRecipe,
+    Recipe,
+    Subscribe,
+    Tag,
+    User,
+)
+
+pytestmark = pytest.mark.django_db
+
+OPTIONS = {
+    'users': 30,
+    'recipes': 200,
+    'tags': 4,
+    'ingredients': 50,
+    'batch_size': 64,
+    'seed': 7,
+}
+
+
+def snapshot() -> dict:
+    return {
+        'recipes': list(
+            Recipe.objects.order_by('pk').values_list(
+                'author__username',
+                'name',
+                'text',
+                'cooking_time',
+                'favorites_count',
+                'carts_count',
+            )
+        ),
+        'ingredients': list(
+            IngredientInRecipe.objects.order_by('pk').values_list(
+                'recipe__name',
+                'ingredient__name',
+                'amount',
+            )
+        ),
+        'subscriptions': list(
+            Subscribe.objects.order_by('pk').values_list(
+                'user__username',
+                'author__username',
+            )
+        ),
+        'favorites': list(
+            Favorite.objects.order_by('pk').values_list(
+                'author__username',
+                'recipe__name',
+            )
+        ),
+    }
+
+
+class TestGenerateData:
+    def test_generates_consistent_rows(self) -> None:
+        call_command('generate_data', **OPTIONS)
+        assert User.objects.count() == OPTIONS['users']
+        assert Recipe.objects.count() == OPTIONS['recipes']
+        assert Tag.objects.count() == OPTIONS['tags']
+        assert not Recipe.objects.filter(tags=None).exists()
+        assert not Recipe.objects.filter(ingredientinrecipe=None).exists()
+        assert Subscribe.objects.exists()
+        assert Favorite.objects.exists() and Cart.objects.exists()
+        assert Recipe.objects.reconcile_counters() == 0
+        assert list(
+            Recipe.objects.order_by('pub_date').values_list('pk', flat=True)
+        ) == list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+
+    @pytest.mark.parametrize('no_copy', (False, True))
+    def test_same_seed_same_data(self, no_copy: bool) -> None:
+        call_command('generate_data', **OPTIONS)
+        expected = snapshot()
+        User.objects.all().delete()
+        call_command('generate_data', **OPTIONS, no_copy=no_copy)
+        assert snapshot() == expected
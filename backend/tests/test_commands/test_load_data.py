@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+ROWS = (
+    {'name': 'соль', 'measurement_unit': 'г'},
+    {'name': 'сахар', 'measurement_unit': 'г'},
+    {'name': 'соль', 'measurement_unit': 'г'},
+    {'name': 'соль', 'measurement_unit': 'щепотка'},
+)
+
+
+class TestLoadData:
+    @pytest.fixture()
+    def csv_file(self, tmp_path: Path) -> Path:
+        path = tmp_path / 'ingredients.csv'
+        path.write_text(
+            ''.join(
+                f'{row["name"]},{row["measurement_unit"]}\n' for row in ROWS
+            ),
+            encoding='utf-8',
+        )
+        return path
+
+    @pytest.fixture()
+    def json_file(self, tmp_path: Path) -> Path:
+        path = tmp_path / 'ingredients.json'
+        path.write_text(json.dumps(ROWS, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def test_load_csv(self, csv_file: Path) -> None:
+        call_command('load_data', file=csv_file, batch_size=2)
+        assert set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        ) == {('соль', 'г'), ('сахар', 'г'), ('соль', 'щепотка')}
+
+    def test_load_json(self, json_file: Path) -> None:
+        call_command('load_data', file=json_file, json=True, batch_size=2)
+        assert Ingredient.objects.count() == 3
+
+    def test_load_twice_skips_existing(self, csv_file: Path) -> None:
+        call_command('load_data', file=csv_file)
+        call_command('load_data', file=csv_file)
+        assert Ingredient.objects.count() == 3
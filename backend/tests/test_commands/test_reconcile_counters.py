@@ -0,0 +1,24 @@
+import pytest
+from django.core.management import call_command
+from tests.test_api.factories import CartFactory, RecipeFactory
+
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.django_db
+
+
+class TestReconcileCounters:
+    def test_fixes_drifted_counters(self) -> None:
+        recipe, untouched = RecipeFactory.create_batch(2)
+        CartFactory.create_batch(2, recipe=recipe)
+        Recipe.objects.filter(pk=recipe.pk).update(favorites_count=3)
+        call_command('reconcile_counters')
+        recipe.refresh_from_db()
+        untouched.refresh_from_db()
+        assert (recipe.favorites_count, recipe.carts_count) == (0, 2)
+        assert (untouched.favorites_count, untouched.carts_count) == (0, 0)
+
+    def test_counters_in_sync(self) -> None:
+        CartFactory.create()
+        Recipe.objects.reconcile_counters()
+        assert Recipe.objects.reconcile_counters() == 0
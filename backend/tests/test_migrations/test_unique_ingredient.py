@@ -0,0 +1,62 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from tests.test_api.factories import (
+    IngredientFactory,
+    IngredientInRecipeFactory,
+    RecipeFactory,
+)
+
+from recipes.models import Ingredient, IngredientInRecipe
+
+pytestmark = pytest.mark.django_db
+
+migration = import_module(
+    'recipes.migrations.0006_ingredient_unique_ingredient'
+)
+
+
+@pytest.fixture()
+def without_unique_ingredient() -> None:
+    constraint = next(
+        constraint
+        for constraint in Ingredient._meta.constraints
+        if constraint.name == 'unique_ingredient'
+    )
+    with connection.schema_editor() as schema_editor:
+        schema_editor.remove_constraint(Ingredient, constraint)
+
+
+class TestMergeDuplicateIngredients:
+    def test_duplicates_are_merged(self, without_unique_ingredient) -> None:
+        kept, duplicate, other = (
+            IngredientFactory.create(name='соль', measurement_unit='г')
+            for _ in range(3)
+        )
+        unique = IngredientFactory.create(name='соль', measurement_unit='кг')
+        both, single = RecipeFactory.create_batch(2)
+        IngredientInRecipeFactory.create(
+            recipe=both, ingredient=kept, amount=5
+        )
+        IngredientInRecipeFactory.create(
+            recipe=both, ingredient=duplicate, amount=7
+        )
+        IngredientInRecipeFactory.create(
+            recipe=single, ingredient=other, amount=3
+        )
+        with connection.schema_editor() as schema_editor:
+            migration.merge_duplicate_ingredients(apps, schema_editor)
+        assert set(Ingredient.objects.values_list('pk', flat=True)) == {
+            kept.pk,
+            unique.pk,
+        }, 'Дубликаты ингредиента не объединены.'
+        assert set(
+            IngredientInRecipe.objects.values_list(
+                'recipe', 'ingredient', 'amount'
+            )
+        ) == {
+            (both.pk, kept.pk, 12),
+            (single.pk, kept.pk, 3),
+        }, 'Количества в рецептах не перенесены на оставшийся ингредиент.'